@@ -0,0 +1,453 @@
+"""
+Check that every filter combination of the paged /associations endpoints
+(and /associations/summary/top) is served by an index, and that query plans
+haven't regressed.
+
+For each endpoint and each combination of up to --max-filters of its filters,
+runs EXPLAIN on the endpoint's query (same filter builder, ORDER BY and LIMIT)
+with sample values taken from the data (plus include_descendants variants of
+the doid combinations when DISEASE_ONTOLOGY_PATH is set), then flags
+sequential scans of relations and sorts of at least --min-rows rows and
+suggests CREATE INDEX statements for them:
+
+    python -m app.cli.index_advisor
+    python -m app.cli.index_advisor --baseline plans.json --update-baseline
+    python -m app.cli.index_advisor --baseline plans.json
+
+With --baseline, flags already recorded in the baseline are accepted and a
+case fails only on a new flag or a plan cost above --cost-tolerance times
+its baseline cost. Exits 1 if any case fails, so it can gate a release.
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import re
+import sys
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from sqlalchemy import text
+
+from app.core.config import DISEASE_ONTOLOGY_PATH
+from app.db.database import IS_POSTGRES, engine
+from app.indexes import disease_ontology
+from app.routers.associations import (
+    EVIDENCE_ORDER_BY,
+    PROVENANCE_GROUPS,
+    PROVENANCE_ORDER_BY,
+    SUMMARY_ORDER_BY,
+    SUMMARY_TOP_GROUPS,
+    SUMMARY_TOP_RANK_BY,
+    evidence_filters,
+    join_where,
+    provenance_filters,
+    summary_filters,
+    summary_top_filters,
+    summary_top_sql,
+)
+
+logger = logging.getLogger(__name__)
+
+# filters that aren't a column value looked up in the data
+FIXED_VALUES: Dict[str, Any] = {
+    "min_score": 90.0,
+    "exclude_withdrawn": True,
+    "include_descendants": True,
+}
+
+# include_descendants only changes the doid filter (into doid = ANY(subtree)),
+# so it is tried on top of each combination with doid rather than on its own
+SUBTREE_FILTER = "include_descendants"
+
+# (case name, relation, filter builder, filter names, GROUP BY, ORDER BY)
+ENDPOINTS: list[tuple[str, str, Callable, tuple[str, ...], Optional[str], str]] = [
+    (
+        "summary",
+        "mv_disease_target_summary_plus",
+        summary_filters,
+        ("doid", "gene_symbol", "uniprot", "idgtdl", "min_score", SUBTREE_FILTER),
+        None,
+        SUMMARY_ORDER_BY,
+    ),
+    (
+        "evidence",
+        "mv_tictac_associations",
+        evidence_filters,
+        (
+            "doid",
+            "uniprot",
+            "disease_name",
+            "gene_symbol",
+            "molecule_chembl_id",
+            "nct_id",
+            "phase",
+            "overall_status",
+            "exclude_withdrawn",
+            SUBTREE_FILTER,
+        ),
+        None,
+        EVIDENCE_ORDER_BY,
+    ),
+    (
+        "provenance_summary",
+        "mv_tictac_associations_summary",
+        provenance_filters,
+        ("doid", "gene_symbol", "uniprot", "nct_id", "pmid"),
+        None,
+        PROVENANCE_ORDER_BY,
+    ),
+] + [
+    (
+        f"provenance_summary[group_by={group_by}]",
+        "mv_tictac_associations_summary",
+        provenance_filters,
+        ("doid", "gene_symbol", "uniprot", "nct_id", "pmid"),
+        columns,
+        columns,
+    )
+    for group_by, columns in PROVENANCE_GROUPS.items()
+]
+
+# summary/top ranks within each group in a window; an index on
+# (group_by, rank columns) feeds it without a sort
+TOP_ENDPOINTS: list[tuple[str, str, Callable, tuple[str, ...], str, str]] = [
+    (
+        f"summary/top[group_by={group_by}]",
+        "mv_disease_target_summary_plus",
+        summary_top_filters,
+        ("doid", "gene_symbol", "idgtdl", "min_score"),
+        group_by,
+        f"{group_by}, {SUMMARY_TOP_RANK_BY}",
+    )
+    for group_by in SUMMARY_TOP_GROUPS
+]
+
+# a value of median frequency: a typical lookup, neither the rarest nor the
+# most common value (which may legitimately be cheaper to scan)
+SAMPLE_SQL = """
+    SELECT value
+    FROM (
+        SELECT {column} AS value, COUNT(*) AS n
+        FROM core.{relation}
+        WHERE {column} IS NOT NULL
+        GROUP BY {column}
+    ) counted
+    ORDER BY n, value
+    OFFSET (SELECT COUNT(DISTINCT {column}) FROM core.{relation}) / 2
+    LIMIT 1
+"""
+
+# where clauses produced by the filter builders
+EQUALS_RE = re.compile(r"^(\w+|UPPER\(\w+\)) = (:\w+|ANY\(:\w+\))$")
+RANGE_RE = re.compile(r"^(\w+) >= :\w+$")
+ILIKE_RE = re.compile(r"^(\w+) ILIKE :\w+$")
+
+
+def sample_values(relation: str, filters: tuple[str, ...]) -> Dict[str, Any]:
+    values = {}
+    with engine.connect() as connection:
+        for name in filters:
+            if name in FIXED_VALUES:
+                values[name] = FIXED_VALUES[name]
+                continue
+            values[name] = connection.execute(
+                text(SAMPLE_SQL.format(column=name, relation=relation))
+            ).scalar()
+    return values
+
+
+def subtree_doid(relation: str) -> Optional[str]:
+    """
+    A doid of the data with descendants, of median subtree size, for the
+    include_descendants cases (the median doid is often a leaf).
+    """
+    ontology = disease_ontology.get_ontology()
+    with engine.connect() as connection:
+        doids = connection.execute(
+            text(f"SELECT DISTINCT doid FROM core.{relation} WHERE doid IS NOT NULL")
+        ).scalars()
+        sizes = sorted(
+            (len(ontology.descendants(d)), d)
+            for d in doids
+            if len(ontology.descendants(d)) > 1
+        )
+    return sizes[len(sizes) // 2][1] if sizes else None
+
+
+def _combinations(
+    filters: tuple[str, ...], max_filters: int
+) -> Iterator[tuple[str, ...]]:
+    # subtree variants need an ontology; without one the filter raises 501
+    subtree = SUBTREE_FILTER in filters and bool(DISEASE_ONTOLOGY_PATH)
+    filters = tuple(f for f in filters if f != SUBTREE_FILTER)
+    for size in range(max_filters + 1):
+        for combination in itertools.combinations(filters, size):
+            yield combination
+            if subtree and "doid" in combination:
+                yield combination + (SUBTREE_FILTER,)
+
+
+def cases(max_filters: int) -> Iterator[Dict[str, Any]]:
+    for name, relation, builder, filters, group_by, order_by in ENDPOINTS:
+        values = sample_values(relation, filters)
+        if SUBTREE_FILTER in filters and DISEASE_ONTOLOGY_PATH:
+            subtree_values = {
+                **values,
+                "doid": subtree_doid(relation) or values["doid"],
+            }
+        for combination in _combinations(filters, max_filters):
+            if SUBTREE_FILTER in combination:
+                where, params = builder(**{f: subtree_values[f] for f in combination})
+            else:
+                where, params = builder(**{f: values[f] for f in combination})
+            yield {
+                "id": f"{name}?{'&'.join(combination)}",
+                "relation": relation,
+                "where": where,
+                "params": {**params, "limit": 100, "offset": 0},
+                "sql": paged_sql(relation, where, group_by, order_by),
+                "order_by": order_by,
+            }
+
+    for name, relation, builder, filters, group_by, order_by in TOP_ENDPOINTS:
+        values = sample_values(relation, filters)
+        for combination in _combinations(filters, max_filters):
+            where, params = builder(
+                **{
+                    f: values[f] if f in FIXED_VALUES else [values[f]]
+                    for f in combination
+                }
+            )
+            yield {
+                "id": f"{name}?{'&'.join(combination)}",
+                "relation": relation,
+                "where": where,
+                "params": {**params, "k": 10},
+                "sql": summary_top_sql("*", group_by, join_where(where)),
+                "order_by": order_by,
+            }
+
+
+def paged_sql(
+    relation: str, where: list[str], group_by: Optional[str], order_by: str
+) -> str:
+    group_sql = f"GROUP BY {group_by}" if group_by else ""
+    return f"""
+        SELECT {group_by or "*"}
+        FROM core.{relation}
+        {join_where(where)}
+        {group_sql}
+        ORDER BY {order_by}
+        LIMIT :limit OFFSET :offset
+    """
+
+
+def _nodes(plan: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _nodes(child)
+
+
+def relation_rows() -> Dict[str, int]:
+    with engine.connect() as connection:
+        return dict(
+            connection.execute(
+                text(
+                    """
+                SELECT c.relname, c.reltuples::bigint
+                FROM pg_class c
+                JOIN pg_namespace n ON n.oid = c.relnamespace
+                WHERE n.nspname = 'core' AND c.relkind IN ('r', 'm')
+                """
+                )
+            ).all()
+        )
+
+
+def explain(case: Dict[str, Any], rows: Dict[str, int], min_rows: int) -> None:
+    """Add the plan cost and flags (seq scans, sorts >= min_rows) to case."""
+    with engine.connect() as connection:
+        plan = connection.execute(
+            text(f"EXPLAIN (FORMAT JSON) {case['sql']}"), case["params"]
+        ).scalar_one()[0]["Plan"]
+
+    flags = []
+    for node in _nodes(plan):
+        node_type = node["Node Type"]
+        if node_type == "Seq Scan" and rows.get(node["Relation Name"], 0) >= min_rows:
+            flags.append(f"seq scan on core.{node['Relation Name']}")
+        elif (
+            node_type in ("Sort", "Incremental Sort") and node["Plan Rows"] >= min_rows
+        ):
+            flags.append("sort")
+    case["cost"] = plan["Total Cost"]
+    case["flags"] = sorted(set(flags))
+
+
+def _index_name(relation: str, columns: list[str]) -> str:
+    words = [re.sub(r"\W+", "_", c.lower()).strip("_") for c in columns]
+    # identifiers are truncated at 63 characters
+    return f"{relation}_{'_'.join(words)}"[:59] + "_idx"
+
+
+def suggest(case: Dict[str, Any]) -> list[tuple[str, str, tuple[str, ...]]]:
+    """
+    Indexes (relation, method, key columns) that would let a flagged case
+    avoid its scan/sort: a btree led by its first equality (or = ANY)
+    column and followed by the ORDER BY (or range) columns, so it is read
+    in order, and a trigram index per ILIKE column.
+    """
+    equals, ranges, trigram = [], [], []
+    for clause in case["where"]:
+        if m := EQUALS_RE.match(clause):
+            equals.append(m.group(1))
+        elif m := RANGE_RE.match(clause):
+            ranges.append(m.group(1))
+        elif m := ILIKE_RE.match(clause):
+            trigram.append(m.group(1))
+        # "<>" (exclude_withdrawn) isn't selective enough to index
+
+    relation = case["relation"]
+    indexes = []
+    # a range on the sort column (min_score) is served by the same index
+    tail = [c.strip() for c in case["order_by"].split(",")]
+    if equals or ranges or "sort" in case["flags"]:
+        # one leading column is enough: further equalities are checked on the
+        # index rows, and it keeps the suggestions shared between combinations
+        # (each column once: summary/top's ORDER BY may repeat its group_by)
+        columns: Dict[str, str] = {}
+        for column in equals[:1] + tail:
+            columns.setdefault(column.split()[0], column)
+        indexes.append((relation, "btree", tuple(columns.values())))
+    for column in trigram:
+        indexes.append((relation, "gin", (f"{column} gin_trgm_ops",)))
+    return indexes
+
+
+def _bare(columns: tuple[str, ...]) -> tuple[str, ...]:
+    return tuple(c.split()[0] for c in columns)
+
+
+def render_ddl(indexes: list[tuple[str, str, tuple[str, ...]]]) -> list[str]:
+    """
+    CREATE INDEX statements, skipping btrees whose columns repeat or are a
+    prefix of another suggested btree (the longer one serves both).
+    """
+    btrees: Dict[str, list[tuple[str, ...]]] = {}
+    for relation, method, columns in indexes:
+        if method == "btree" and _bare(columns) not in map(
+            _bare, btrees.get(relation, [])
+        ):
+            btrees.setdefault(relation, []).append(columns)
+
+    statements = []
+    for relation, method, columns in dict.fromkeys(indexes):
+        if method == "btree" and (
+            columns not in btrees[relation]
+            or any(
+                len(other) > len(columns)
+                and _bare(other)[: len(columns)] == _bare(columns)
+                for other in btrees[relation]
+            )
+        ):
+            continue
+        name = _index_name(relation, [c.split()[0] for c in columns])
+        # expressions such as UPPER(col) must be parenthesized in an index
+        keys = ", ".join(f"({c})" if "(" in c else c for c in columns)
+        using = " USING GIN" if method == "gin" else ""
+        statements.append(
+            f"CREATE INDEX IF NOT EXISTS {name} ON core.{relation}{using} ({keys});"
+        )
+    if any(method == "gin" for _, method, _ in indexes):
+        # ILIKE '%...%' needs trigram indexes
+        statements.insert(0, "CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+    return statements
+
+
+def compare(
+    case: Dict[str, Any], baseline: Dict[str, Any], tolerance: float
+) -> list[str]:
+    """Problems of case relative to its baseline entry (new flags, cost growth)."""
+    known = baseline.get(case["id"])
+    if known is None:
+        return [f"{flag} (not in baseline)" for flag in case["flags"]]
+    problems = [f"{flag} (new)" for flag in case["flags"] if flag not in known["flags"]]
+    if case["cost"] > known["cost"] * tolerance:
+        problems.append(
+            f"cost {case['cost']:.0f} > {tolerance}x baseline {known['cost']:.0f}"
+        )
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="EXPLAIN every /associations filter combination and flag missing indexes."
+    )
+    parser.add_argument("--max-filters", type=int, default=2, help="default: 2")
+    parser.add_argument(
+        "--min-rows",
+        type=int,
+        default=10_000,
+        help="flag seq scans of relations / sorts with at least this many rows (default: 10000)",
+    )
+    parser.add_argument("--baseline", help="JSON file of accepted plans")
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="write the current plans to --baseline instead of checking",
+    )
+    parser.add_argument(
+        "--cost-tolerance",
+        type=float,
+        default=2.0,
+        help="fail when a plan costs more than this times its baseline (default: 2.0)",
+    )
+    args = parser.parse_args()
+
+    if not IS_POSTGRES:
+        parser.error("plans are checked against Postgres; unset DB_BACKEND")
+    if args.update_baseline and not args.baseline:
+        parser.error("--update-baseline requires --baseline")
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    rows = relation_rows()
+    results = list(cases(args.max_filters))
+    for case in results:
+        explain(case, rows, args.min_rows)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(
+                {c["id"]: {"cost": c["cost"], "flags": c["flags"]} for c in results},
+                f,
+                indent=2,
+                sort_keys=True,
+            )
+        logger.info(f"Wrote {len(results)} plans to {args.baseline}")
+        return
+
+    baseline = {}
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    failed = 0
+    indexes = []
+    for case in results:
+        problems = compare(case, baseline, args.cost_tolerance)
+        if not problems:
+            continue
+        failed += 1
+        logger.info(f"FAIL {case['id']}: {'; '.join(problems)}")
+        indexes.extend(suggest(case))
+
+    if indexes:
+        logger.info("\nSuggested indexes:\n" + "\n".join(render_ddl(indexes)))
+    logger.info(f"\n{len(results)} filter combinations checked, {failed} failed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
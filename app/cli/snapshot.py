@@ -0,0 +1,177 @@
+"""
+Export a read-only snapshot of the TICTAC database for DB_BACKEND=duckdb.
+
+Copies the core tables and materialized views the API reads from Postgres
+(configured through the usual DB_* variables) into a DuckDB file or a
+directory of Parquet files:
+
+    python -m app.cli.snapshot tictac.duckdb
+    python -m app.cli.snapshot snapshot_dir/ --format parquet
+
+Then serve it with DB_BACKEND=duckdb DUCKDB_PATH=tictac.duckdb.
+"""
+
+import argparse
+import logging
+import os
+import re
+import shutil
+import tempfile
+
+import duckdb
+from sqlalchemy import text
+
+from app.db.database import IS_POSTGRES, engine
+from app.db.generation import current_generation
+
+logger = logging.getLogger(__name__)
+
+# relations read by the routers; materialized views become plain tables
+SNAPSHOT_RELATIONS = [
+    "disease",
+    "target",
+    "drug",
+    "drug_name",
+    "study",
+    "publication",
+    "study_publication",
+    "disease_target_study_drug",
+    "mv_tictac_associations",
+    "mv_tictac_associations_summary",
+    "mv_disease_target_summary_plus",
+]
+
+# pg_attribute also covers materialized views (information_schema.columns doesn't)
+COLUMNS_SQL = """
+    SELECT a.attname, format_type(a.atttypid, a.atttypmod)
+    FROM pg_attribute a
+    WHERE a.attrelid = CAST(:relation AS regclass)
+      AND a.attnum > 0
+      AND NOT a.attisdropped
+    ORDER BY a.attnum
+"""
+
+# Postgres types DuckDB understands as-is; anything else is stored as text
+DUCKDB_TYPES = (
+    "bigint",
+    "integer",
+    "smallint",
+    "boolean",
+    "real",
+    "double precision",
+    "text",
+    "character varying",
+    "date",
+    "timestamp without time zone",
+    "timestamp with time zone",
+)
+
+
+# numeric(p,s) up to DuckDB's maximum precision is kept as is; bare numeric
+# (e.g. AVG results) would become DECIMAL(18,3) there and lose digits
+NUMERIC_RE = re.compile(r"numeric\((\d+),(\d+)\)$")
+DUCKDB_MAX_PRECISION = 38
+
+
+def _duckdb_type(pg_type: str) -> str:
+    if pg_type.startswith("numeric"):
+        match = NUMERIC_RE.match(pg_type)
+        if match and int(match.group(1)) <= DUCKDB_MAX_PRECISION:
+            return pg_type
+        return "DOUBLE"
+    return pg_type if pg_type.startswith(DUCKDB_TYPES) else "VARCHAR"
+
+
+def _copy_relation(duck: duckdb.DuckDBPyConnection, name: str, workdir: str) -> int:
+    with engine.connect() as connection:
+        columns = connection.execute(
+            text(COLUMNS_SQL), {"relation": f"core.{name}"}
+        ).all()
+
+        ddl = ", ".join(f'"{col}" {_duckdb_type(pg_type)}' for col, pg_type in columns)
+        duck.execute(f"CREATE TABLE core.{name} ({ddl})")
+
+        # COPY is the fastest way out of Postgres; the CSV only lives in workdir
+        csv_path = os.path.join(workdir, f"{name}.csv")
+        with open(csv_path, "w", encoding="utf-8") as f:
+            cursor = connection.connection.cursor()
+            # COPY (SELECT ...) also works for materialized views
+            cursor.copy_expert(
+                f"COPY (SELECT * FROM core.{name}) TO STDOUT WITH (FORMAT csv, HEADER)",
+                f,
+            )
+            cursor.close()
+
+    # quoted empty strings stay empty strings; unquoted empty fields are NULL
+    duck.execute(
+        f"COPY core.{name} FROM '{csv_path}' (FORMAT csv, HEADER, ALLOW_QUOTED_NULLS false)"
+    )
+    os.remove(csv_path)
+    return duck.execute(f"SELECT COUNT(*) FROM core.{name}").fetchone()[0]
+
+
+def export_snapshot(out: str, fmt: str) -> None:
+    generation = current_generation()
+    # build next to the target and swap in at the end, so a running API
+    # never sees a half-written snapshot
+    workdir = tempfile.mkdtemp(
+        prefix=".tictac-snapshot-", dir=os.path.dirname(os.path.abspath(out))
+    )
+
+    try:
+        db_path = os.path.join(workdir, "snapshot.duckdb")
+        duck = duckdb.connect(db_path)
+        duck.execute("CREATE SCHEMA core")
+
+        for name in SNAPSHOT_RELATIONS:
+            rows = _copy_relation(duck, name, workdir)
+            logger.info(f"core.{name}: {rows} rows")
+
+        duck.execute(
+            "CREATE TABLE core.snapshot_info AS "
+            "SELECT CAST(? AS VARCHAR) AS generation, now() AS exported_at",
+            [generation],
+        )
+
+        if fmt == "duckdb":
+            duck.close()
+            os.replace(db_path, out)
+        else:
+            parquet_dir = os.path.join(workdir, "parquet")
+            os.makedirs(parquet_dir)
+            for name in SNAPSHOT_RELATIONS + ["snapshot_info"]:
+                duck.execute(
+                    f"COPY core.{name} TO '{os.path.join(parquet_dir, name)}.parquet' (FORMAT parquet)"
+                )
+            duck.close()
+            if os.path.isdir(out):
+                shutil.rmtree(out)
+            shutil.move(parquet_dir, out)
+
+        logger.info(f"Wrote {fmt} snapshot of generation {generation} to {out}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Export the TICTAC core tables and materialized views for DB_BACKEND=duckdb."
+    )
+    parser.add_argument("out", help="target .duckdb file or Parquet directory")
+    parser.add_argument(
+        "--format",
+        choices=["duckdb", "parquet"],
+        help="default: duckdb if OUT ends with .duckdb, parquet otherwise",
+    )
+    args = parser.parse_args()
+
+    if not IS_POSTGRES:
+        parser.error("snapshots are exported from Postgres; unset DB_BACKEND")
+
+    fmt = args.format or ("duckdb" if args.out.endswith(".duckdb") else "parquet")
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    export_snapshot(args.out, fmt)
+
+
+if __name__ == "__main__":
+    main()
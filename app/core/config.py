@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 from dotenv import load_dotenv
 
@@ -14,19 +15,99 @@ def get_required_env(key: str) -> str:
     return value
 
 
-# Database configuration with validation
-DB_NAME = get_required_env("DB_NAME")
-DB_USER = get_required_env("DB_USER")
-DB_PASSWORD = get_required_env("DB_PASSWORD")
-DB_HOST = get_required_env("DB_HOST")
-DB_PORT_STR = get_required_env("DB_PORT")
+def get_int_env(key: str, default: int) -> int:
+    """Get optional integer environment variable or raise error if malformed."""
+    value = os.getenv(key)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError as e:
+        raise ValueError(f"{key} must be a valid integer, got: {value}") from e
+
+
+# Backend: "postgres" (default) or "duckdb" (read-only snapshot, see app/cli/snapshot.py)
+DB_BACKEND = os.getenv("DB_BACKEND", "postgres")
+
+if DB_BACKEND == "postgres":
+    # Database configuration with validation
+    DB_NAME = get_required_env("DB_NAME")
+    DB_USER = get_required_env("DB_USER")
+    DB_PASSWORD = get_required_env("DB_PASSWORD")
+    DB_HOST = get_required_env("DB_HOST")
+    DB_PORT_STR = get_required_env("DB_PORT")
+
+    try:
+        DB_PORT = int(DB_PORT_STR)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"DB_PORT must be a valid integer, got: {DB_PORT_STR}") from e
+
+    # Computed database URL
+    DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+elif DB_BACKEND == "duckdb":
+    # a .duckdb file, or a directory of <table>.parquet files
+    DUCKDB_PATH = get_required_env("DUCKDB_PATH")
+    if not os.path.exists(DUCKDB_PATH):
+        raise ValueError(f"DUCKDB_PATH does not exist: {DUCKDB_PATH}")
 
-try:
-    DB_PORT = int(DB_PORT_STR)
-except (ValueError, TypeError) as e:
+    # Parquet snapshots are mounted as views on a named in-memory database
+    # (named so that every pooled connection shares the same catalog)
+    DATABASE_URL = (
+        "duckdb:///:memory:tictac"
+        if os.path.isdir(DUCKDB_PATH)
+        else f"duckdb:///{DUCKDB_PATH}"
+    )
+else:
+    raise ValueError(f"DB_BACKEND must be postgres or duckdb, got: {DB_BACKEND}")
+
+# Data generation: identifies the restored tictac_db snapshot, used to key caches.
+# Derived from the catalog unless pinned explicitly (e.g. to the tictac_db image tag)
+DATA_GENERATION = os.getenv("DATA_GENERATION")
+# How often (seconds) each worker re-checks the derived generation
+GENERATION_CHECK_SECONDS = get_int_env("GENERATION_CHECK_SECONDS", 60)
+
+# Response cache shared by all workers: "sqlite" (default), "redis" or "none"
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "sqlite")
+if CACHE_BACKEND not in ("sqlite", "redis", "none"):
     raise ValueError(
-        f"DB_PORT must be a valid integer, got: {DB_PORT_STR}"
-    ) from e
+        f"CACHE_BACKEND must be sqlite, redis or none, got: {CACHE_BACKEND}"
+    )
+# SQLite file (must be on a filesystem local to the workers)
+CACHE_PATH = os.getenv(
+    "CACHE_PATH", os.path.join(tempfile.gettempdir(), "tictac-cache.sqlite3")
+)
+# e.g. redis://localhost:6379/0
+CACHE_URL = os.getenv("CACHE_URL")
+if CACHE_BACKEND == "redis" and not CACHE_URL:
+    raise ValueError("CACHE_URL is required when CACHE_BACKEND=redis")
+# Least recently used entries beyond this are evicted (sqlite; redis uses maxmemory)
+CACHE_MAX_ENTRIES = get_int_env("CACHE_MAX_ENTRIES", 10_000)
+# Default time-to-live (seconds) for routes that don't set their own
+CACHE_TTL_SECONDS = get_int_env("CACHE_TTL_SECONDS", 300)
+
+# Per-generation row-hash manifests behind /associations/changes (keep on a
+# persistent volume: a generation's manifest can only be built while it is served)
+MANIFEST_DIR = os.getenv(
+    "MANIFEST_DIR", os.path.join(tempfile.gettempdir(), "tictac-manifests")
+)
+
+# Seconds between startup warm-up retries while the database is unavailable
+WARMUP_RETRY_SECONDS = get_int_env("WARMUP_RETRY_SECONDS", 10)
+
+# Disease Ontology OBO file (doid.obo) for ?include_descendants=true; unset disables it
+DISEASE_ONTOLOGY_PATH = os.getenv("DISEASE_ONTOLOGY_PATH")
+if DISEASE_ONTOLOGY_PATH and not os.path.isfile(DISEASE_ONTOLOGY_PATH):
+    raise ValueError(f"DISEASE_ONTOLOGY_PATH does not exist: {DISEASE_ONTOLOGY_PATH}")
+
+# Export jobs: result files are spooled here (shared by all workers of a deployment)
+EXPORT_DIR = os.getenv(
+    "EXPORT_DIR", os.path.join(tempfile.gettempdir(), "tictac-exports")
+)
+# Background export threads per worker process
+EXPORT_WORKERS = get_int_env("EXPORT_WORKERS", 2)
 
-# Computed database URL
-DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# Opt-in request profiling (app/core/profiling.py): requests sending
+# "X-Profile: <PROFILE_TOKEN>" get a Server-Timing breakdown. Unset disables it
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")
+# pyinstrument sampling interval (seconds) for X-Profile-Format profiles
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.001"))
@@ -0,0 +1,176 @@
+import contextvars
+import functools
+import importlib.util
+import inspect
+import logging
+import secrets
+import time
+from typing import Any, Dict, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, Response
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+
+from app.core.config import PROFILE_INTERVAL, PROFILE_TOKEN
+from app.db.database import engine
+
+logger = logging.getLogger(__name__)
+
+# Opt-in request profiling. Nothing below is installed unless PROFILE_TOKEN is
+# set, and then only requests sending "X-Profile: <PROFILE_TOKEN>" are timed:
+# - Server-Timing: db (cursor execute), materialize (the rest of the endpoint:
+#   building rows/dicts), serialize (response model + JSON encoding), total
+# - "X-Profile-Format: speedscope" (or html) returns a pyinstrument profile of
+#   the endpoint instead of its response
+# Profiled requests skip the response cache, so they always measure the query.
+
+PROFILE_FORMATS = {"speedscope", "html"}
+
+# per-request timings; a dict so the endpoint's worker thread can update it
+_timings: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar(
+    "profile_timings", default=None
+)
+
+
+def profiling_active() -> bool:
+    """True inside a profiled request (the response cache is bypassed then)."""
+    return _timings.get() is not None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+    timings = _timings.get()
+    if timings is not None:
+        timings["db_start"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, many):
+    timings = _timings.get()
+    if timings is not None and "db_start" in timings:
+        timings["db"] += time.perf_counter() - timings.pop("db_start")
+        timings["queries"] += 1
+
+
+def _start_profiler(timings: Dict[str, Any]):
+    if timings.get("format") is None:
+        return None
+    from pyinstrument import Profiler
+
+    profiler = Profiler(interval=PROFILE_INTERVAL, async_mode="disabled")
+    profiler.start()
+    return profiler
+
+
+def _stop_profiler(timings: Dict[str, Any], profiler) -> None:
+    if profiler is None:
+        return
+    profiler.stop()
+    if timings["format"] == "html":
+        timings["profile"] = HTMLResponse(profiler.output_html())
+    else:
+        from pyinstrument.renderers import SpeedscopeRenderer
+
+        timings["profile"] = Response(
+            profiler.output(renderer=SpeedscopeRenderer()),
+            media_type="application/json",
+        )
+
+
+def _timed(call):
+    # wrap an endpoint function to record its own duration (and profile it)
+    if inspect.iscoroutinefunction(call):
+
+        @functools.wraps(call)
+        async def timed(**kwargs):
+            timings = _timings.get()
+            if timings is None:
+                return await call(**kwargs)
+            profiler = _start_profiler(timings)
+            start = time.perf_counter()
+            try:
+                return await call(**kwargs)
+            finally:
+                timings["endpoint_end"] = time.perf_counter()
+                timings["endpoint"] = timings["endpoint_end"] - start
+                _stop_profiler(timings, profiler)
+
+    else:
+
+        @functools.wraps(call)
+        def timed(**kwargs):
+            timings = _timings.get()
+            if timings is None:
+                return call(**kwargs)
+            profiler = _start_profiler(timings)
+            start = time.perf_counter()
+            try:
+                return call(**kwargs)
+            finally:
+                timings["endpoint_end"] = time.perf_counter()
+                timings["endpoint"] = timings["endpoint_end"] - start
+                _stop_profiler(timings, profiler)
+
+    return timed
+
+
+def _server_timing(timings: Dict[str, Any], total: float, end: float) -> str:
+    endpoint = timings.get("endpoint", 0.0)
+    parts = [
+        ("db", timings["db"], f"queries={timings['queries']}"),
+        ("materialize", max(endpoint - timings["db"], 0.0), None),
+        ("serialize", end - timings.get("endpoint_end", end), None),
+        ("total", total, None),
+    ]
+    return ", ".join(
+        f"{name};dur={seconds * 1000:.2f}" + (f';desc="{desc}"' if desc else "")
+        for name, seconds, desc in parts
+    )
+
+
+async def _profile_request(request: Request, call_next):
+    header = request.headers.get("x-profile")
+    if header is None or not secrets.compare_digest(
+        header.encode(), PROFILE_TOKEN.encode()
+    ):
+        return await call_next(request)
+
+    profile_format = request.headers.get("x-profile-format")
+    if profile_format is not None:
+        if profile_format not in PROFILE_FORMATS:
+            return Response(
+                f"X-Profile-Format must be one of: {', '.join(sorted(PROFILE_FORMATS))}",
+                status_code=400,
+            )
+        if importlib.util.find_spec("pyinstrument") is None:
+            return Response(
+                "X-Profile-Format requires pyinstrument (pip install pyinstrument)",
+                status_code=501,
+            )
+
+    timings = {"db": 0.0, "queries": 0, "format": profile_format}
+    token = _timings.set(timings)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        _timings.reset(token)
+    end = time.perf_counter()
+
+    response = timings.get("profile", response)
+    response.headers["Server-Timing"] = _server_timing(timings, end - start, end)
+    return response
+
+
+def install_profiling(app: FastAPI) -> None:
+    """
+    Enable opt-in profiling on app (call after the routers are included).
+    Only used when PROFILE_TOKEN is set, so it costs nothing otherwise.
+    """
+    for route in app.routes:
+        if isinstance(route, APIRoute):
+            route.dependant.call = _timed(route.dependant.call)
+
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    app.middleware("http")(_profile_request)
+    logger.info("Request profiling enabled (X-Profile header)")
@@ -0,0 +1,177 @@
+import contextlib
+import fcntl
+import functools
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict
+
+from sqlalchemy import text
+
+from app.core.config import DISEASE_ONTOLOGY_PATH, WARMUP_RETRY_SECONDS
+from app.db.database import engine, test_connection
+from app.db.generation import current_generation
+from app.db.manifests import ensure_manifest, stop_manifests
+from app.indexes import disease_ontology, drug_names, ranking, similarity
+from app.routers.associations import (
+    EVIDENCE_ORDER_BY,
+    PROVENANCE_ORDER_BY,
+    SUMMARY_ORDER_BY,
+)
+
+logger = logging.getLogger(__name__)
+
+# materialized views behind the paged endpoints, with their ORDER BY
+VIEWS = {
+    "mv_disease_target_summary_plus": SUMMARY_ORDER_BY,
+    "mv_tictac_associations": EVIDENCE_ORDER_BY,
+    "mv_tictac_associations_summary": PROVENANCE_ORDER_BY,
+}
+
+# readiness of this worker, reported by /meta/ready
+_state: Dict[str, Any] = {
+    "status": "warming",
+    "attempts": 0,
+    "started_at": None,
+    "ready_at": None,
+    "seconds": None,
+    "steps": {},
+    "error": None,
+}
+_stop = threading.Event()
+
+
+def _open_pool() -> None:
+    # check out every pooled connection at once, so none is opened by a request
+    with contextlib.ExitStack() as stack:
+        for _ in range(engine.pool.size()):
+            stack.enter_context(engine.connect()).execute(text("SELECT 1"))
+
+
+def _scan_views() -> None:
+    """
+    Read each view in full once per data generation, across the workers
+    (which share the temp directory). That loads the view into the OS page cache; Postgres reads
+    big relations through a small ring buffer, so it doesn't fill
+    shared_buffers. The cache is shared, so the other workers skip the scan.
+    """
+    generation = hashlib.sha256(current_generation().encode()).hexdigest()[:16]
+    marker = os.path.join(tempfile.gettempdir(), f"tictac-warmup-{generation}")
+    fd = os.open(f"{marker}.lock", os.O_CREAT | os.O_RDWR, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        # another worker is scanning
+        os.close(fd)
+        return
+    try:
+        if os.path.exists(marker):
+            return
+        with engine.connect() as connection:
+            for relation in VIEWS:
+                connection.execute(
+                    text(f"SELECT COUNT(*) FROM core.{relation}")
+                ).scalar_one()
+        open(marker, "w").close()
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+def _read_view(relation: str, order_by: str) -> None:
+    # the first page, through the index behind each endpoint's ORDER BY
+    with engine.connect() as connection:
+        connection.execute(
+            text(f"SELECT * FROM core.{relation} ORDER BY {order_by} LIMIT 100")
+        ).all()
+
+
+def _steps() -> list[tuple[str, Callable[[], Any]]]:
+    steps = [
+        ("pool", _open_pool),
+        ("generation", current_generation),
+        ("view_scan", _scan_views),
+        *(
+            (relation, functools.partial(_read_view, relation, order_by))
+            for relation, order_by in VIEWS.items()
+        ),
+        ("similarity_index", similarity.get_index),
+        ("rank_index", ranking.get_index),
+        ("drug_name_index", drug_names.get_index),
+    ]
+    if DISEASE_ONTOLOGY_PATH:
+        steps.append(("disease_ontology", disease_ontology.get_ontology))
+    return steps
+
+
+def warm_up() -> bool:
+    """
+    Open the connection pool, read the materialized views and build the
+    in-memory indexes, timing each step. Returns True once the worker is
+    ready; never raises.
+    """
+    _state["attempts"] += 1
+    _state["started_at"] = datetime.now(timezone.utc).isoformat()
+    steps: Dict[str, float] = {}
+    start = time.perf_counter()
+    name = "database"
+    try:
+        if not test_connection():
+            raise RuntimeError("database is not reachable")
+        for name, step in _steps():
+            step_start = time.perf_counter()
+            step()
+            steps[name] = round(time.perf_counter() - step_start, 3)
+    except Exception as e:
+        _state.update(steps=steps, error=f"{name}: {type(e).__name__}: {e}")
+        logger.warning(f"Warm-up failed at {_state['error']}")
+        return False
+
+    _state.update(
+        status="ready",
+        ready_at=datetime.now(timezone.utc).isoformat(),
+        seconds=round(time.perf_counter() - start, 3),
+        steps=steps,
+        error=None,
+    )
+    logger.info(f"Warm-up done in {_state['seconds']}s: {steps}")
+
+    # the change manifest can take minutes, so it is built in the background
+    try:
+        ensure_manifest(current_generation())
+    except Exception as e:
+        logger.warning(f"Could not start manifest build: {type(e).__name__}: {e}")
+    return True
+
+
+def _retry() -> None:
+    while not _stop.wait(WARMUP_RETRY_SECONDS):
+        if warm_up():
+            return
+
+
+def start_warmup() -> None:
+    """
+    Warm up before the worker accepts requests. If that fails (e.g. the
+    database is still restoring), serve anyway and retry in the background;
+    /meta/ready reports 503 until a warm-up succeeds.
+    """
+    if not warm_up():
+        threading.Thread(target=_retry, name="warmup", daemon=True).start()
+
+
+def stop_warmup() -> None:
+    _stop.set()
+    stop_manifests()
+
+
+def readiness() -> Dict[str, Any]:
+    """Warm-up state of this worker plus a live database check."""
+    state = dict(_state)
+    state["database"] = test_connection()
+    state["ready"] = state["status"] == "ready" and state["database"]
+    return state
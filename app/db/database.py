@@ -1,14 +1,50 @@
-from sqlalchemy import create_engine, text
+import glob
+import os
+import re
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.orm import sessionmaker
 
-from app.core.config import DATABASE_URL
+from app.core.config import DATABASE_URL, DB_BACKEND
+
+IS_POSTGRES = DB_BACKEND == "postgres"
+
+if IS_POSTGRES:
+    # Create SQLAlchemy engine
+    engine = create_engine(
+        DATABASE_URL,
+        pool_pre_ping=True,
+        echo=False,
+    )
+else:
+    from app.core.config import DUCKDB_PATH
+
+    # snapshots are never written, and read_only lets every worker open the same file
+    engine = create_engine(
+        DATABASE_URL,
+        pool_pre_ping=True,
+        echo=False,
+        connect_args={} if os.path.isdir(DUCKDB_PATH) else {"read_only": True},
+    )
+
+    if os.path.isdir(DUCKDB_PATH):
+
+        @event.listens_for(engine, "connect")
+        def _mount_parquet(dbapi_connection, connection_record):
+            # expose <DUCKDB_PATH>/<table>.parquet as core.<table> (catalog is shared)
+            cursor = dbapi_connection.cursor()
+            cursor.execute("CREATE SCHEMA IF NOT EXISTS core")
+            for path in sorted(glob.glob(os.path.join(DUCKDB_PATH, "*.parquet"))):
+                name = os.path.splitext(os.path.basename(path))[0]
+                if not re.match(r"^\w+$", name):
+                    continue
+                quoted = path.replace("'", "''")
+                cursor.execute(
+                    f"CREATE OR REPLACE VIEW core.{name} AS SELECT * FROM read_parquet('{quoted}')"
+                )
+            cursor.close()
 
-# Create SQLAlchemy engine
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,
-    echo=False,
-)
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -26,6 +62,18 @@ def get_db():
         db.close()
 
 
+def require_postgres(feature: str) -> None:
+    """
+    Raise 501 for features that rely on Postgres-only functionality
+    (full-text search, planner estimates, ...) when serving a DuckDB snapshot.
+    """
+    if not IS_POSTGRES:
+        raise HTTPException(
+            status_code=501,
+            detail=f"{feature} is not available on the {DB_BACKEND} backend.",
+        )
+
+
 def test_connection() -> bool:
     """
     Test database connection.
@@ -0,0 +1,52 @@
+import threading
+import time
+
+from sqlalchemy import text
+
+from app.core.config import DATA_GENERATION, GENERATION_CHECK_SECONDS
+from app.db.database import IS_POSTGRES, engine
+
+# Fingerprint of the core tables and materialized views. A pg_restore or
+# REFRESH MATERIALIZED VIEW rewrites the relation files, which changes
+# relfilenode and (almost always) the relation size.
+GENERATION_SQL = """
+    SELECT left(md5(string_agg(
+        c.relname || ':' || c.relfilenode || ':' || pg_relation_size(c.oid),
+        ',' ORDER BY c.relname
+    )), 12)
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = 'core'
+      AND c.relkind IN ('r', 'm')
+"""
+
+# DuckDB snapshots carry the generation of the Postgres database they were
+# exported from (see app/cli/snapshot.py)
+SNAPSHOT_GENERATION_SQL = "SELECT generation FROM core.snapshot_info"
+
+_lock = threading.Lock()
+_cached: tuple[str, float] | None = None
+
+
+def current_generation() -> str:
+    """
+    Identifier of the data currently served. Cached per worker for
+    GENERATION_CHECK_SECONDS; DATA_GENERATION pins it instead.
+    """
+    global _cached
+
+    if DATA_GENERATION:
+        return DATA_GENERATION
+
+    with _lock:
+        now = time.monotonic()
+        if _cached is not None and now - _cached[1] < GENERATION_CHECK_SECONDS:
+            return _cached[0]
+
+        with engine.connect() as connection:
+            generation = connection.execute(
+                text(GENERATION_SQL if IS_POSTGRES else SNAPSHOT_GENERATION_SQL)
+            ).scalar_one()
+
+        _cached = (generation, now)
+        return generation
@@ -0,0 +1,283 @@
+import array
+import fcntl
+import gzip
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from decimal import Decimal
+from typing import Any, Dict, Iterator, Optional
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import text
+
+from app.core.config import MANIFEST_DIR
+from app.db.database import engine
+from app.db.generation import current_generation
+
+logger = logging.getLogger(__name__)
+
+# Per-generation manifests of row hashes, so /associations/changes can send
+# only the rows that differ between two data generations.
+# <MANIFEST_DIR>/<dir>/: meta.json (written last, marks the manifest complete)
+# and per dataset <dataset>.npz (key hash, row hash, line in the keys file;
+# sorted by key hash) plus <dataset>.keys.gz (natural key per line, JSON)
+
+# dataset -> (relation, natural key)
+DATASETS = {
+    "evidence": (
+        "mv_tictac_associations",
+        ("doid", "uniprot", "molecule_chembl_id", "nct_id"),
+    ),
+    "summary": ("mv_disease_target_summary_plus", ("doid", "uniprot")),
+}
+
+# rows fetched from the server-side cursor per batch
+BATCH_SIZE = 5000
+# manifests of older generations are pruned beyond this many
+MANIFEST_KEEP = 10
+# how long shutdown waits for a build to stop at its next batch
+STOP_TIMEOUT_SECONDS = 30
+
+_stopping = threading.Event()
+_builders: list[threading.Thread] = []
+
+
+def _hash_default(value: Any) -> str:
+    # equal decimals hash alike whatever their scale (5181.000 vs 5181.0000)
+    if isinstance(value, Decimal):
+        return str(value.normalize())
+    return str(value)
+
+
+def row_hash(values: list) -> int:
+    # 64-bit hash of a row (or key); dates and decimals hash by their text
+    encoded = json.dumps(values, default=_hash_default, separators=(",", ":")).encode()
+    return int.from_bytes(hashlib.blake2b(encoded, digest_size=8).digest(), "little")
+
+
+def _generation_dir(generation: str) -> str:
+    # pinned DATA_GENERATION values may not be safe as a directory name
+    name = hashlib.sha256(generation.encode()).hexdigest()[:16]
+    return os.path.join(MANIFEST_DIR, name)
+
+
+def read_meta(generation: str) -> Optional[Dict[str, Any]]:
+    """meta.json of a complete manifest for generation, or None."""
+    try:
+        with open(os.path.join(_generation_dir(generation), "meta.json")) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def available_generations() -> list[str]:
+    """Generations with a complete manifest, newest first."""
+    if not os.path.isdir(MANIFEST_DIR):
+        return []
+    metas = []
+    for name in os.listdir(MANIFEST_DIR):
+        try:
+            with open(os.path.join(MANIFEST_DIR, name, "meta.json")) as f:
+                metas.append(json.load(f))
+        except FileNotFoundError:
+            continue
+    return [m["generation"] for m in sorted(metas, key=lambda m: -m["built_at"])]
+
+
+class Manifest:
+    """Row hashes of one dataset in one generation."""
+
+    def __init__(self, generation: str, dataset: str):
+        self.path = os.path.join(_generation_dir(generation), dataset)
+        with np.load(f"{self.path}.npz") as data:
+            self.key_hash = data["key_hash"]
+            self.row_hash = data["row_hash"]
+            self.line = data["line"]
+
+    def keys(self, lines: np.ndarray) -> Iterator[list]:
+        # natural keys at the given lines of the keys file
+        wanted = set(lines.tolist())
+        with gzip.open(f"{self.path}.keys.gz", "rt", encoding="utf-8") as f:
+            for i, line in enumerate(f):
+                if i in wanted:
+                    yield json.loads(line)
+
+
+def _build_dataset(connection, directory: str, dataset: str) -> int:
+    relation, key_columns = DATASETS[dataset]
+    result = connection.execution_options(
+        stream_results=True, yield_per=BATCH_SIZE
+    ).execute(text(f"SELECT * FROM core.{relation}"))
+    columns = list(result.keys())
+    key_index = [columns.index(c) for c in key_columns]
+
+    key_hashes, row_hashes = array.array("Q"), array.array("Q")
+    keys_path = os.path.join(directory, f"{dataset}.keys.gz")
+    with gzip.open(f"{keys_path}.part", "wt", encoding="utf-8") as f:
+        for rows in result.partitions():
+            if _stopping.is_set():
+                raise RuntimeError("interrupted by shutdown")
+            for row in rows:
+                key = [row[i] for i in key_index]
+                f.write(json.dumps(key, default=str) + "\n")
+                key_hashes.append(row_hash(key))
+                row_hashes.append(row_hash(list(row)))
+
+    key_hash = np.frombuffer(key_hashes, dtype=np.uint64)
+    order = np.argsort(key_hash, kind="stable")
+    key_hash = key_hash[order]
+    # rows sharing a natural key are compared as a group (sum of their hashes);
+    # a changed group is streamed whole, so clients replace all rows of the key
+    starts = np.flatnonzero(np.r_[True, key_hash[1:] != key_hash[:-1]])
+    grouped = np.add.reduceat(np.frombuffer(row_hashes, dtype=np.uint64)[order], starts)
+
+    with open(os.path.join(directory, f"{dataset}.npz.part"), "wb") as f:
+        np.savez(f, key_hash=key_hash[starts], row_hash=grouped, line=order[starts])
+    os.replace(f"{keys_path}.part", keys_path)
+    os.replace(
+        os.path.join(directory, f"{dataset}.npz.part"),
+        os.path.join(directory, f"{dataset}.npz"),
+    )
+    return len(key_hash)
+
+
+def _prune() -> None:
+    # keep the newest MANIFEST_KEEP complete manifests (and any being built)
+    for generation in available_generations()[MANIFEST_KEEP:]:
+        shutil.rmtree(_generation_dir(generation), ignore_errors=True)
+
+
+def _build(generation: str, lock_fd: int) -> None:
+    directory = _generation_dir(generation)
+    try:
+        start = time.perf_counter()
+        rows = {}
+        with engine.connect() as connection:
+            for dataset in DATASETS:
+                rows[dataset] = _build_dataset(connection, directory, dataset)
+
+        # the data may have been restored while reading it
+        if current_generation() != generation:
+            logger.warning(f"Generation changed while building manifest {generation}")
+            return
+
+        meta = {"generation": generation, "built_at": time.time(), "rows": rows}
+        with open(os.path.join(directory, "meta.json.part"), "w") as f:
+            json.dump(meta, f)
+        os.replace(
+            os.path.join(directory, "meta.json.part"),
+            os.path.join(directory, "meta.json"),
+        )
+        logger.info(
+            f"Built manifest for generation {generation} in "
+            f"{time.perf_counter() - start:.1f}s: {rows}"
+        )
+        _prune()
+    except Exception as e:
+        if _stopping.is_set():
+            logger.info(f"Manifest for generation {generation} stopped by shutdown")
+            return
+        logger.error(
+            f"Manifest for generation {generation} failed: {type(e).__name__}: {e}",
+            exc_info=True,
+        )
+    finally:
+        fcntl.flock(lock_fd, fcntl.LOCK_UN)
+        os.close(lock_fd)
+
+
+def ensure_manifest(generation: str) -> bool:
+    """
+    True if the manifest of generation is complete. Otherwise start building
+    it in a background thread (unless some worker already is) and return False.
+    """
+    if read_meta(generation) is not None:
+        return True
+    if _stopping.is_set():
+        return False
+
+    directory = _generation_dir(generation)
+    os.makedirs(directory, exist_ok=True)
+    # held by the building process; the OS drops it if that process dies
+    fd = os.open(os.path.join(directory, "lock"), os.O_CREAT | os.O_RDWR, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return False
+
+    # re-check now that we hold the lock: another worker may have just finished it
+    if read_meta(generation) is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+        return True
+
+    builder = threading.Thread(
+        target=_build, args=(generation, fd), name="manifest", daemon=True
+    )
+    _builders[:] = [t for t in _builders if t.is_alive()] + [builder]
+    builder.start()
+    return False
+
+
+def stop_manifests() -> None:
+    """
+    Stop this worker's manifest builds (called on app shutdown): they stop
+    at their next batch, leaving no manifest, and are waited for, so the
+    process doesn't exit under a thread still inside the database driver.
+    """
+    _stopping.set()
+    for builder in _builders:
+        builder.join(STOP_TIMEOUT_SECONDS)
+
+
+def diff(since: str, generation: str, dataset: str) -> Dict[str, Any]:
+    """
+    Key hashes added/modified and keys-file lines removed in `generation`
+    relative to `since` (both manifests must be complete).
+    """
+    old, new = Manifest(since, dataset), Manifest(generation, dataset)
+    common, old_i, new_i = np.intersect1d(
+        old.key_hash, new.key_hash, assume_unique=True, return_indices=True
+    )
+    return {
+        "old": old,
+        "added": set(new.key_hash[~np.isin(new.key_hash, old.key_hash)].tolist()),
+        "modified": set(common[old.row_hash[old_i] != new.row_hash[new_i]].tolist()),
+        "removed": old.line[~np.isin(old.key_hash, new.key_hash)],
+    }
+
+
+def stream_changes(dataset: str, changes: Dict[str, Any]) -> Iterator[str]:
+    """
+    NDJSON lines for a diff: removed keys (from the old manifest), then the
+    current added/modified rows, found by one streaming scan of the relation.
+    """
+    relation, key_columns = DATASETS[dataset]
+    for key in changes["old"].keys(changes["removed"]):
+        yield json.dumps({"op": "removed", "key": dict(zip(key_columns, key))}) + "\n"
+
+    if not changes["added"] and not changes["modified"]:
+        return
+    with engine.connect() as connection:
+        result = connection.execution_options(
+            stream_results=True, yield_per=BATCH_SIZE
+        ).execute(text(f"SELECT * FROM core.{relation}"))
+        for rows in result.mappings().partitions():
+            for row in rows:
+                key = [row[c] for c in key_columns]
+                h = row_hash(key)
+                if h in changes["added"]:
+                    op = "added"
+                elif h in changes["modified"]:
+                    op = "modified"
+                else:
+                    continue
+                line = {"op": op, "key": dict(zip(key_columns, key)), "row": dict(row)}
+                # encoded like the JSON endpoints (decimals as numbers)
+                yield json.dumps(jsonable_encoder(line)) + "\n"
@@ -0,0 +1,14 @@
+-- Full-text search indexes backing /studies/fulltext and /publications/fulltext.
+-- The indexed expressions must match STUDY_DOCUMENT / PUBLICATION_DOCUMENT in
+-- app/db/schema.py, otherwise the planner can't use them.
+--
+-- The API connects as a read-only user, so apply this as the database owner, e.g.:
+--   docker exec -i tictac-db psql -U postgres -d tictac_db < app/db/migrations/001_fulltext_search.sql
+
+CREATE INDEX IF NOT EXISTS study_fulltext_idx
+    ON core.study
+    USING GIN (to_tsvector('english', coalesce(study_title, '') || ' ' || coalesce(official_title, '')));
+
+CREATE INDEX IF NOT EXISTS publication_fulltext_idx
+    ON core.publication
+    USING GIN (to_tsvector('english', coalesce(citation, '')));
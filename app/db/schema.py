@@ -0,0 +1,60 @@
+import logging
+
+from sqlalchemy import text
+
+from app.db.database import IS_POSTGRES, engine
+
+logger = logging.getLogger(__name__)
+
+# tsvector documents used by the full-text endpoints.
+# must match the index expressions in app/db/migrations/001_fulltext_search.sql
+STUDY_DOCUMENT = "to_tsvector('english', coalesce(study_title, '') || ' ' || coalesce(official_title, ''))"
+PUBLICATION_DOCUMENT = "to_tsvector('english', coalesce(citation, ''))"
+
+# indexes the API expects on top of the restored tictac_db snapshot
+# (schema, index name) -> migration that creates it
+REQUIRED_INDEXES = {
+    ("core", "study_fulltext_idx"): "001_fulltext_search.sql",
+    ("core", "publication_fulltext_idx"): "001_fulltext_search.sql",
+}
+
+
+def missing_indexes() -> list[str]:
+    """
+    Return "schema.index (migration)" for every required index not present in the DB.
+    """
+    with engine.connect() as connection:
+        present = {
+            (row.schemaname, row.indexname)
+            for row in connection.execute(
+                text("SELECT schemaname, indexname FROM pg_indexes")
+            )
+        }
+
+    return [
+        f"{schema}.{index} ({migration})"
+        for (schema, index), migration in REQUIRED_INDEXES.items()
+        if (schema, index) not in present
+    ]
+
+
+def check_indexes() -> bool:
+    """
+    Log a warning for each missing index. Returns True if all are present.
+    Never raises, so a missing migration or unreachable DB doesn't block startup.
+    """
+    if not IS_POSTGRES:
+        # DuckDB snapshots have no secondary indexes to check
+        return True
+
+    try:
+        missing = missing_indexes()
+    except Exception as e:
+        logger.warning(f"Could not check required indexes: {type(e).__name__}: {e}")
+        return False
+
+    for index in missing:
+        logger.warning(
+            f"Missing index {index}; apply the migration in app/db/migrations"
+        )
+    return not missing
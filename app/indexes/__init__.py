@@ -0,0 +1,47 @@
+import logging
+import threading
+from typing import Callable, Optional, TypeVar
+
+from sqlalchemy import text
+
+from app.db.database import engine
+from app.db.generation import current_generation
+
+logger = logging.getLogger(__name__)
+
+Index = TypeVar("Index")
+
+
+def generation_index(
+    name: str,
+    build: Callable[..., Index],
+    *queries: str,
+    describe: Callable[[Index], str],
+) -> Callable[[], Index]:
+    """
+    get_index() for an in-memory index of the current data generation:
+    build(generation, rows of each query), rebuilt (once per worker) when
+    the generation changes. describe(index) is logged after each build.
+    """
+    lock = threading.Lock()
+    index: Optional[Index] = None
+
+    def get_index() -> Index:
+        nonlocal index
+
+        generation = current_generation()
+        with lock:
+            if index is None or index.generation != generation:
+                with engine.connect() as connection:
+                    rows = [
+                        connection.execute(text(sql)).mappings().all()
+                        for sql in queries
+                    ]
+                index = build(generation, *rows)
+                logger.info(
+                    f"Built {name} index for generation {generation}: "
+                    f"{describe(index)}"
+                )
+            return index
+
+    return get_index
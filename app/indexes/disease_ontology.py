@@ -0,0 +1,135 @@
+import logging
+import os
+import threading
+from typing import Dict, Optional
+
+from fastapi import HTTPException
+
+from app.core.config import DISEASE_ONTOLOGY_PATH
+
+logger = logging.getLogger(__name__)
+
+
+def parse_obo(path: str) -> Dict[str, Dict]:
+    """
+    Non-obsolete [Term] stanzas of an OBO file:
+    id -> {"name": ..., "parents": [is_a ids], "alt_ids": [...]}.
+    """
+    terms: Dict[str, Dict] = {}
+    term: Optional[Dict] = None
+
+    def flush():
+        if term and "id" in term and not term.get("obsolete"):
+            terms[term["id"]] = term
+
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("["):
+                flush()
+                term = {"parents": [], "alt_ids": []} if line == "[Term]" else None
+                continue
+            if term is None or ": " not in line:
+                continue
+            tag, _, value = line.partition(": ")
+            # drop trailing "! comment"
+            value = value.split(" ! ")[0].strip()
+            if tag == "id":
+                term["id"] = value
+            elif tag == "name":
+                term["name"] = value
+            elif tag == "is_a":
+                term["parents"].append(value.split()[0])
+            elif tag == "alt_id":
+                term["alt_ids"].append(value)
+            elif tag == "is_obsolete":
+                term["obsolete"] = value == "true"
+    flush()
+    return terms
+
+
+class DiseaseOntology:
+    """
+    Disease Ontology is_a hierarchy with the descendant closure of every
+    term precomputed, so a subtree filter is a single doid = ANY(...).
+    Descendants include the term itself and the alt_ids of each term, as
+    the data may use either.
+    """
+
+    def __init__(self, terms: Dict[str, Dict], mtime: float):
+        self.mtime = mtime
+        self.names = {doid: term.get("name") for doid, term in terms.items()}
+        self.primary = {
+            alt: doid for doid, term in terms.items() for alt in term["alt_ids"]
+        }
+        self.children: Dict[str, list[str]] = {doid: [] for doid in terms}
+        for doid, term in terms.items():
+            for parent in term["parents"]:
+                if parent in self.children:
+                    self.children[parent].append(doid)
+
+        # closure in post-order, so every child is done before its parents
+        # (an is_a cycle, which the ontology shouldn't have, is cut where found)
+        self.closure: Dict[str, frozenset[str]] = {}
+        visiting: set[str] = set()
+        for root in terms:
+            stack = [(root, False)]
+            while stack:
+                doid, expanded = stack.pop()
+                if doid in self.closure or (not expanded and doid in visiting):
+                    continue
+                if expanded:
+                    subtree = {doid, *terms[doid]["alt_ids"]}
+                    for child in self.children[doid]:
+                        subtree |= self.closure.get(child, frozenset())
+                    self.closure[doid] = frozenset(subtree)
+                else:
+                    visiting.add(doid)
+                    stack.append((doid, True))
+                    stack.extend(
+                        (c, False) for c in self.children[doid] if c not in self.closure
+                    )
+
+    def resolve(self, doid: str) -> Optional[str]:
+        # primary id of doid (which may be an alt_id), None if unknown
+        doid = self.primary.get(doid, doid)
+        return doid if doid in self.names else None
+
+    def descendants(self, doid: str) -> list[str]:
+        """doid and all its descendants; just doid if it isn't in the ontology."""
+        term = self.resolve(doid)
+        if term is None:
+            return [doid]
+        return sorted(self.closure[term] | {doid})
+
+
+_lock = threading.Lock()
+_ontology: Optional[DiseaseOntology] = None
+
+
+def require_ontology() -> None:
+    """Raise 501 for subtree features when no ontology file is configured."""
+    if not DISEASE_ONTOLOGY_PATH:
+        raise HTTPException(
+            status_code=501,
+            detail="Disease Ontology subtrees are not available (DISEASE_ONTOLOGY_PATH is not set).",
+        )
+
+
+def get_ontology() -> DiseaseOntology:
+    """
+    The ontology at DISEASE_ONTOLOGY_PATH, reloaded (once per worker) when
+    the file changes.
+    """
+    global _ontology
+
+    mtime = os.path.getmtime(DISEASE_ONTOLOGY_PATH)
+    with _lock:
+        if _ontology is None or _ontology.mtime != mtime:
+            _ontology = DiseaseOntology(parse_obo(DISEASE_ONTOLOGY_PATH), mtime)
+            logger.info(
+                f"Loaded disease ontology from {DISEASE_ONTOLOGY_PATH}: "
+                f"{len(_ontology.names)} terms, "
+                f"{sum(map(len, _ontology.closure.values()))} closure pairs"
+            )
+        return _ontology
@@ -0,0 +1,204 @@
+import bisect
+import re
+from typing import Any, Dict, Iterator
+
+import numpy as np
+
+from app.indexes import generation_index
+
+# every name of every drug (drugs without names are still found by ChEMBL id)
+NAMES_SQL = """
+    SELECT d.drug_id, d.molecule_chembl_id, d.cid, dn.drug_name, dn.is_preferred
+    FROM core.drug d
+    LEFT JOIN core.drug_name dn ON dn.drug_id = d.drug_id
+"""
+
+# match quality, best first; trigram-only matches rank below any substring
+EXACT, PREFIX, SUBSTRING, SIMILAR = 3, 2, 1, 0
+MATCH_LABELS = {
+    EXACT: "exact",
+    PREFIX: "prefix",
+    SUBSTRING: "substring",
+    SIMILAR: "similar",
+}
+# pg_trgm's default similarity threshold
+SIMILARITY_THRESHOLD = 0.3
+
+WORD_RE = re.compile(r"\w+")
+_EMPTY = np.zeros(0, dtype=np.int64)
+
+
+def _normalize(name: str) -> str:
+    return " ".join(name.casefold().split())
+
+
+def _trigrams(name: str) -> set[str]:
+    # like pg_trgm: each word padded with two spaces in front and one behind
+    grams = set()
+    for word in WORD_RE.findall(name):
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _inner_trigrams(name: str) -> set[str]:
+    # trigrams any name containing `name` as a substring must also have
+    return {
+        word[i : i + 3] for word in WORD_RE.findall(name) for i in range(len(word) - 2)
+    }
+
+
+class DrugNameIndex:
+    """
+    Synonyms and ChEMBL ids of the drugs of one data generation, with a
+    sorted list for exact/prefix lookups and trigram postings for
+    substring and similarity matches.
+    """
+
+    def __init__(self, generation: str, rows: list):
+        self.generation = generation
+
+        drug_pos: Dict[int, int] = {}
+        self.drugs: list[Dict[str, Any]] = []
+        names: Dict[tuple[int, str], tuple[str, bool]] = {}
+        for row in rows:
+            if row["drug_id"] not in drug_pos:
+                drug_pos[row["drug_id"]] = len(self.drugs)
+                self.drugs.append(
+                    {
+                        "molecule_chembl_id": row["molecule_chembl_id"],
+                        "cid": row["cid"],
+                        "drug_name": None,
+                    }
+                )
+            drug = drug_pos[row["drug_id"]]
+            if row["drug_name"] and row["is_preferred"]:
+                self.drugs[drug]["drug_name"] = row["drug_name"]
+            for name, preferred in (
+                (row["drug_name"], bool(row["is_preferred"])),
+                (row["molecule_chembl_id"], False),
+            ):
+                if name and _normalize(name):
+                    key = (drug, _normalize(name))
+                    # one entry per distinct name of a drug, preferred first
+                    if key not in names or preferred:
+                        names[key] = (name, preferred)
+
+        self.names = [name for name, _ in names.values()]
+        self.norm = [norm for _, norm in names]
+        self.entry_drug = np.array([drug for drug, _ in names], dtype=np.int64)
+
+        order = sorted(range(len(self.norm)), key=self.norm.__getitem__)
+        self.sorted_norm = [self.norm[i] for i in order]
+        self.sorted_entries = np.array(order, dtype=np.int64)
+
+        # rank within a match tier: preferred names, then shorter, then alphabetical
+        alpha = np.empty(len(order), dtype=np.int64)
+        alpha[self.sorted_entries] = np.arange(len(order))
+        static = np.lexsort(
+            (
+                alpha,
+                np.array([len(n) for n in self.norm], dtype=np.int64),
+                ~np.array([p for _, p in names.values()], dtype=bool),
+            )
+        )
+        self.entry_rank = np.empty(len(order), dtype=np.int64)
+        self.entry_rank[static] = np.arange(len(order))
+
+        postings: Dict[str, list[int]] = {}
+        grams = [_trigrams(n) for n in self.norm]
+        for i, entry_grams in enumerate(grams):
+            for gram in entry_grams:
+                postings.setdefault(gram, []).append(i)
+        self.postings = {
+            g: np.array(ids, dtype=np.int64) for g, ids in postings.items()
+        }
+        self.entry_grams = np.array([len(g) for g in grams], dtype=np.int64)
+
+    def _count(self, grams: set[str]) -> np.ndarray:
+        # number of `grams` each entry has
+        ids = [self.postings.get(g, _EMPTY) for g in grams]
+        return np.bincount(
+            np.concatenate(ids) if ids else _EMPTY, minlength=len(self.norm)
+        )
+
+    def _ranked(self, entries: np.ndarray) -> np.ndarray:
+        return entries[np.argsort(self.entry_rank[entries], kind="stable")]
+
+    def _tiers(self, query: str) -> Iterator[tuple[int, np.ndarray]]:
+        # entries matching query, best tier first, each tier in ranked order.
+        # lazy: the trigram tiers are only computed if the earlier ones
+        # don't fill the page
+        lo = bisect.bisect_left(self.sorted_norm, query)
+        exact = bisect.bisect_right(self.sorted_norm, query)
+        hi = bisect.bisect_left(self.sorted_norm, query + "\U0010ffff")
+        yield EXACT, self._ranked(self.sorted_entries[lo:exact])
+        yield PREFIX, self._ranked(self.sorted_entries[exact:hi])
+
+        matched = np.zeros(len(self.norm), dtype=bool)
+        matched[self.sorted_entries[lo:hi]] = True
+        inner = _inner_trigrams(query)
+        if inner:
+            # only names with all of q's trigrams can contain it
+            hits = self._count(inner)
+            substring = np.array(
+                [
+                    i
+                    for i in np.flatnonzero((hits == len(inner)) & ~matched)
+                    if query in self.norm[i]
+                ],
+                dtype=np.int64,
+            )
+            matched[substring] = True
+            yield SUBSTRING, self._ranked(substring)
+
+        grams = _trigrams(query)
+        if grams:
+            shared = self._count(grams)
+            similarity = shared / (len(grams) + self.entry_grams - shared)
+            similar = np.flatnonzero((similarity >= SIMILARITY_THRESHOLD) & ~matched)
+            yield SIMILAR, similar[
+                np.lexsort((self.entry_rank[similar], -similarity[similar]))
+            ]
+
+    def search(self, q: str, limit: int) -> list[Dict[str, Any]]:
+        """
+        Drugs with a name or ChEMBL id matching q (case-insensitive), one per
+        drug with its preferred name and best-matching name. Ranked by match
+        quality (exact, prefix, substring, then trigram similarity), then
+        preferred names and shorter names first.
+        """
+        query = _normalize(q)
+        grams = _trigrams(query)
+
+        out: list[Dict[str, Any]] = []
+        seen: set[int] = set()
+        for tier, entries in self._tiers(query):
+            for i in entries:
+                drug = int(self.entry_drug[i])
+                if drug in seen:
+                    continue
+                seen.add(drug)
+                entry_grams = _trigrams(self.norm[i])
+                union = len(grams | entry_grams)
+                out.append(
+                    {
+                        **self.drugs[drug],
+                        "matched_name": self.names[i],
+                        "match": MATCH_LABELS[tier],
+                        "similarity": (
+                            round(len(grams & entry_grams) / union, 3) if union else 0.0
+                        ),
+                    }
+                )
+                if len(out) == limit:
+                    return out
+        return out
+
+
+get_index = generation_index(
+    "drug name",
+    DrugNameIndex,
+    NAMES_SQL,
+    describe=lambda index: f"{len(index.drugs)} drugs, {len(index.names)} names",
+)
@@ -0,0 +1,222 @@
+from typing import Any, Dict, Optional
+
+import numpy as np
+from scipy.stats import rankdata
+
+from app.indexes import generation_index
+
+# metrics combined into meanrank, in weight-vector order
+RANK_METRICS = ("n_drugs", "n_studies", "n_publications")
+
+LABEL_COLUMNS = (
+    "doid",
+    "disease_name",
+    "tcrdtargetname",
+    "gene_symbol",
+    "uniprot",
+    "idgtdl",
+)
+
+SUMMARY_SQL = f"""
+    SELECT {", ".join(LABEL_COLUMNS + RANK_METRICS)}
+    FROM core.mv_disease_target_summary_plus
+"""
+
+# drug/study evidence behind n_drugs and n_studies, with each study's phase
+STUDY_SQL = """
+    SELECT DISTINCT doid, uniprot, nct_id, phase, molecule_chembl_id
+    FROM core.mv_tictac_associations
+    WHERE nct_id IS NOT NULL
+"""
+
+# publication evidence behind n_publications
+PUBLICATION_SQL = """
+    SELECT DISTINCT doid, uniprot, nct_id, pmid
+    FROM core.mv_tictac_associations_summary
+    WHERE pmid IS NOT NULL
+"""
+
+
+def _codes(values: list) -> tuple[np.ndarray, np.ndarray]:
+    # factorize: (distinct values, code of each value)
+    return np.unique(np.array(values, dtype=object), return_inverse=True)
+
+
+def _distinct_per_pair(
+    pairs: np.ndarray, items: np.ndarray, n_items: int, n_pairs: int
+) -> np.ndarray:
+    # COUNT(DISTINCT item) GROUP BY pair
+    keys = np.unique(pairs.astype(np.int64) * n_items + items)
+    return np.bincount(keys // n_items, minlength=n_pairs)
+
+
+class RankIndex:
+    """
+    Disease-target pairs of one data generation with the evidence behind
+    their counts, so meanrank can be recomputed with other weights or over
+    a subset of trial phases without a round trip to the database.
+    """
+
+    def __init__(
+        self, generation: str, summary: list, studies: list, publications: list
+    ):
+        self.generation = generation
+        self.n_pairs = len(summary)
+        self.labels = {
+            column: np.array([row[column] for row in summary], dtype=object)
+            for column in LABEL_COLUMNS
+        }
+        self.counts = np.array(
+            [[row[metric] or 0 for metric in RANK_METRICS] for row in summary],
+            dtype=np.int64,
+        ).reshape(-1, len(RANK_METRICS))
+
+        pair_pos = {(row["doid"], row["uniprot"]): i for i, row in enumerate(summary)}
+        studies = [r for r in studies if (r["doid"], r["uniprot"]) in pair_pos]
+        publications = [
+            r for r in publications if (r["doid"], r["uniprot"]) in pair_pos
+        ]
+
+        # study codes, each with its phase; publications of studies without
+        # drug evidence get phase "" and never match a phase filter
+        nct_ids, study_codes = _codes([r["nct_id"] for r in studies])
+        study_pos = {nct_id: i for i, nct_id in enumerate(nct_ids)}
+        study_phase = np.full(len(nct_ids) + 1, "", dtype=object)
+        study_phase[study_codes] = [r["phase"] or "" for r in studies]
+        self.phase_labels, self.study_phase = _codes(list(study_phase))
+
+        self.evidence_pair = np.array(
+            [pair_pos[(r["doid"], r["uniprot"])] for r in studies], dtype=np.int64
+        )
+        self.evidence_study = study_codes.astype(np.int64)
+        drugs, self.evidence_drug = _codes(
+            [r["molecule_chembl_id"] or "" for r in studies]
+        )
+        self.n_drugs = len(drugs)
+        # COUNT(DISTINCT molecule_chembl_id) ignores NULLs
+        self.evidence_has_drug = drugs[self.evidence_drug] != ""
+
+        self.publication_pair = np.array(
+            [pair_pos[(r["doid"], r["uniprot"])] for r in publications],
+            dtype=np.int64,
+        )
+        self.publication_study = np.array(
+            [study_pos.get(r["nct_id"], len(nct_ids)) for r in publications],
+            dtype=np.int64,
+        )
+        pmids, self.publication_pmid = _codes([r["pmid"] for r in publications])
+        self.n_pmids = len(pmids)
+
+    def phase_counts(self, phases: list[str]) -> np.ndarray:
+        """
+        n_drugs, n_studies, n_publications per pair, counting only studies whose
+        phase contains one of `phases` (case-insensitive, like evidence?phase=).
+        """
+        wanted = [p.strip().upper() for p in phases]
+        allowed = np.array(
+            [any(w in label.upper() for w in wanted) for label in self.phase_labels]
+        )
+        study_ok = allowed[self.study_phase]
+
+        counts = np.zeros_like(self.counts)
+        keep = study_ok[self.evidence_study]
+        drug_keep = keep & self.evidence_has_drug
+        counts[:, 0] = _distinct_per_pair(
+            self.evidence_pair[drug_keep],
+            self.evidence_drug[drug_keep],
+            self.n_drugs,
+            self.n_pairs,
+        )
+        counts[:, 1] = _distinct_per_pair(
+            self.evidence_pair[keep],
+            self.evidence_study[keep],
+            len(self.study_phase),
+            self.n_pairs,
+        )
+        keep = study_ok[self.publication_study]
+        counts[:, 2] = _distinct_per_pair(
+            self.publication_pair[keep],
+            self.publication_pmid[keep],
+            self.n_pmids,
+            self.n_pairs,
+        )
+        return counts
+
+    def rank(
+        self,
+        weights: np.ndarray,
+        phases: Optional[list[str]] = None,
+        filters: Optional[Dict[str, str]] = None,
+        min_score: Optional[float] = None,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Re-rank the candidate pairs (matching filters, and with evidence in
+        `phases` if given). Each metric is ranked descending with ties sharing
+        the lowest rank, meanrank is the weighted mean of those ranks and
+        meanrankscore = 100 - percent rank of meanrank.
+        Returns pair indexes best first, with their counts and scores.
+        """
+        mask = np.ones(self.n_pairs, dtype=bool)
+        for column, value in (filters or {}).items():
+            mask &= self.labels[column] == value
+
+        counts = self.counts
+        if phases:
+            counts = self.phase_counts(phases)
+            mask &= counts[:, 1] > 0
+
+        rows = np.flatnonzero(mask)
+        counts = counts[rows]
+        if len(rows) == 0:
+            meanrank = percentile = np.zeros(0)
+        else:
+            ranks = np.column_stack(
+                [rankdata(-counts[:, i], method="min") for i in range(counts.shape[1])]
+            )
+            meanrank = ranks @ weights / weights.sum()
+            percentile = (
+                (rankdata(meanrank, method="min") - 1) / max(len(rows) - 1, 1) * 100
+            )
+
+        order = np.lexsort((rows, percentile))
+        if min_score is not None:
+            order = order[100 - percentile[order] >= min_score]
+
+        return {
+            "rows": rows[order],
+            "counts": counts[order],
+            "meanrank": meanrank[order],
+            "percentile": percentile[order],
+        }
+
+    def items(
+        self, ranking: Dict[str, np.ndarray], start: int, stop: int
+    ) -> list[Dict[str, Any]]:
+        # rows in the shape of /associations/summary
+        out = []
+        for i in range(start, min(stop, len(ranking["rows"]))):
+            row = ranking["rows"][i]
+            percentile = float(ranking["percentile"][i])
+            out.append(
+                {
+                    **{column: self.labels[column][row] for column in LABEL_COLUMNS},
+                    **dict(zip(RANK_METRICS, map(int, ranking["counts"][i]))),
+                    "meanrankscore": 100 - percentile,
+                    "meanrank": round(float(ranking["meanrank"][i]), 3),
+                    "percentile_meanrank": percentile,
+                }
+            )
+        return out
+
+
+get_index = generation_index(
+    "rank",
+    RankIndex,
+    SUMMARY_SQL,
+    STUDY_SQL,
+    PUBLICATION_SQL,
+    describe=lambda index: (
+        f"{index.n_pairs} pairs, {len(index.evidence_pair)} study rows, "
+        f"{len(index.publication_pair)} publication rows"
+    ),
+)
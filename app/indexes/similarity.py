@@ -0,0 +1,151 @@
+from typing import Any, Dict, Literal, Optional
+
+import numpy as np
+from scipy import sparse
+
+from app.indexes import generation_index
+
+SimilarityMetric = Literal["jaccard", "cosine"]
+
+# one row per disease-target pair with evidence
+INCIDENCE_SQL = """
+    SELECT DISTINCT doid, disease_name, uniprot, gene_symbol, tcrdtargetname
+    FROM core.mv_disease_target_summary_plus
+    WHERE doid IS NOT NULL AND uniprot IS NOT NULL
+"""
+
+# query rows scored per sparse product, bounds the dense (n x batch) result
+BATCH_SIZE = 64
+
+
+class IncidenceIndex:
+    """
+    Binary disease x target incidence matrix of one data generation.
+    Targets are compared by the diseases they share and diseases by
+    the targets they share.
+    """
+
+    def __init__(self, generation: str, rows: list):
+        self.generation = generation
+        doids = np.array([r["doid"] for r in rows], dtype=object)
+        uniprots = np.array([r["uniprot"] for r in rows], dtype=object)
+        self.doids, disease_idx = np.unique(doids, return_inverse=True)
+        self.uniprots, target_idx = np.unique(uniprots, return_inverse=True)
+
+        self.disease_pos = {doid: i for i, doid in enumerate(self.doids)}
+        self.target_pos = {uniprot: i for i, uniprot in enumerate(self.uniprots)}
+        self.disease_labels: list[Dict[str, Any]] = [{}] * len(self.doids)
+        self.target_labels: list[Dict[str, Any]] = [{}] * len(self.uniprots)
+        for row, d, t in zip(rows, disease_idx, target_idx):
+            self.disease_labels[d] = {"disease_name": row["disease_name"]}
+            self.target_labels[t] = {
+                "gene_symbol": row["gene_symbol"],
+                "tcrdtargetname": row["tcrdtargetname"],
+            }
+
+        matrix = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (disease_idx, target_idx)),
+            shape=(len(self.doids), len(self.uniprots)),
+        )
+        # DISTINCT on labels may repeat a pair
+        matrix.data[:] = 1
+        self.by_disease = matrix
+        self.by_target = matrix.T.tocsr()
+
+    def neighbors(
+        self,
+        matrix: sparse.csr_matrix,
+        queries: np.ndarray,
+        metric: SimilarityMetric,
+        limit: int,
+    ) -> list[list[tuple[int, float, int]]]:
+        """
+        Top `limit` rows of `matrix` most similar to each query row, as
+        (row, similarity, n_shared), best first. Rows sharing nothing are skipped.
+        """
+        sizes = np.diff(matrix.indptr).astype(np.float64)
+        results = []
+        for start in range(0, len(queries), BATCH_SIZE):
+            batch = queries[start : start + BATCH_SIZE]
+            # shared[i, j]: columns shared by row i and query j
+            shared = (matrix @ matrix[batch].T).toarray()
+            if metric == "jaccard":
+                union = sizes[:, None] + sizes[batch][None, :] - shared
+                scores = shared / np.maximum(union, 1)
+            else:
+                norms = np.sqrt(sizes[:, None] * sizes[batch][None, :])
+                scores = shared / np.maximum(norms, 1)
+            scores[batch, np.arange(len(batch))] = 0
+            scores[shared == 0] = 0
+
+            for j in range(len(batch)):
+                column = scores[:, j]
+                k = min(limit, int(np.count_nonzero(column)))
+                if k == 0:
+                    results.append([])
+                    continue
+                top = np.argpartition(-column, k - 1)[:k]
+                top = top[np.lexsort((top, -column[top]))]
+                results.append(
+                    [(int(i), float(column[i]), int(shared[i, j])) for i in top]
+                )
+        return results
+
+    def similar_targets(
+        self, uniprot: str, metric: SimilarityMetric, limit: int
+    ) -> Optional[Dict[str, Any]]:
+        pos = self.target_pos.get(uniprot)
+        if pos is None:
+            return None
+        (hits,) = self.neighbors(self.by_target, np.array([pos]), metric, limit)
+        return {
+            "uniprot": uniprot,
+            **self.target_labels[pos],
+            "metric": metric,
+            "n_diseases": int(self.by_target[pos].nnz),
+            "items": [
+                {
+                    "uniprot": self.uniprots[i],
+                    **self.target_labels[i],
+                    "similarity": round(score, 6),
+                    "n_shared_diseases": n_shared,
+                    "n_diseases": int(self.by_target[i].nnz),
+                }
+                for i, score, n_shared in hits
+            ],
+        }
+
+    def similar_diseases(
+        self, doid: str, metric: SimilarityMetric, limit: int
+    ) -> Optional[Dict[str, Any]]:
+        pos = self.disease_pos.get(doid)
+        if pos is None:
+            return None
+        (hits,) = self.neighbors(self.by_disease, np.array([pos]), metric, limit)
+        return {
+            "doid": doid,
+            **self.disease_labels[pos],
+            "metric": metric,
+            "n_targets": int(self.by_disease[pos].nnz),
+            "items": [
+                {
+                    "doid": self.doids[i],
+                    **self.disease_labels[i],
+                    "similarity": round(score, 6),
+                    "n_shared_targets": n_shared,
+                    "n_targets": int(self.by_disease[i].nnz),
+                }
+                for i, score, n_shared in hits
+            ],
+        }
+
+
+get_index = generation_index(
+    "similarity",
+    IncidenceIndex,
+    INCIDENCE_SQL,
+    describe=lambda index: (
+        f"{len(index.doids)} diseases x {len(index.uniprots)} targets, "
+        f"{index.by_disease.nnz} pairs"
+    ),
+)
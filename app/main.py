@@ -1,25 +1,43 @@
 import os
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
 # Check if we're running behind a reverse proxy
 root_path = "/tictac" if os.getenv("BEHIND_PROXY") == "true" else ""
 
+from app.core.config import PROFILE_TOKEN
+from app.core.warmup import start_warmup, stop_warmup
+from app.db.schema import check_indexes
 from app.routers import (
     associations,
     diseases,
     drugs,
+    exports,
     meta,
     publications,
     studies,
     targets,
 )
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # warn (don't fail) if migrations in app/db/migrations haven't been applied
+    check_indexes()
+    # pool, materialized views and in-memory indexes (see /meta/ready)
+    start_warmup()
+    yield
+    stop_warmup()
+    exports.shutdown_exports()
+
+
 app = FastAPI(
     title="TICTAC API",
     description="Initial development version of the TICTAC backend.",
     version="0.1.0",
     root_path=root_path,
+    lifespan=lifespan,
 )
 
 # Include routers with /api/v1 prefix
@@ -30,3 +48,10 @@ app.include_router(publications.router, prefix="/api/v1")
 app.include_router(diseases.router, prefix="/api/v1")
 app.include_router(targets.router, prefix="/api/v1")
 app.include_router(drugs.router, prefix="/api/v1")
+app.include_router(exports.router, prefix="/api/v1")
+
+# opt-in profiling, installed only when configured (see app/core/profiling.py)
+if PROFILE_TOKEN:
+    from app.core.profiling import install_profiling
+
+    install_profiling(app)
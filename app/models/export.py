@@ -0,0 +1,31 @@
+from typing import Literal, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+ExportDataset = Literal["summary", "evidence", "provenance", "evidence_provenance"]
+
+
+class ExportRequest(BaseModel):
+    """Body of POST /exports. Filters mirror the /associations endpoints."""
+
+    # unknown keys are rejected, like validate_query_params does for query strings
+    model_config = ConfigDict(extra="forbid")
+
+    # summary -> /associations/summary, evidence -> /associations/evidence,
+    # provenance -> /associations/provenance_summary,
+    # evidence_provenance -> evidence rows joined with their PMIDs/citations
+    dataset: ExportDataset
+
+    doid: Optional[str] = None
+    uniprot: Optional[str] = None
+    gene_symbol: Optional[str] = None
+    idgtdl: Optional[str] = None
+    min_score: Optional[float] = None
+    disease_name: Optional[str] = None
+    molecule_chembl_id: Optional[str] = None
+    nct_id: Optional[str] = None
+    phase: Optional[str] = None
+    overall_status: Optional[str] = None
+    exclude_withdrawn: bool = False
+    include_descendants: bool = False
+    pmid: Optional[str] = None
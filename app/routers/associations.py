@@ -1,33 +1,420 @@
 # app/routers/associations.py
-from typing import Any, Dict, Optional
+from itertools import groupby
+from typing import Any, Dict, Literal, Optional
 
-from fastapi import APIRouter, Depends, Query
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from app.core.exceptions import handle_database_error
-from app.db.database import get_db
+from app.db.database import IS_POSTGRES, get_db
+from app.db.generation import current_generation
+from app.db.manifests import diff, ensure_manifest, read_meta, stream_changes
+from app.indexes import disease_ontology
+from app.indexes.ranking import get_index as get_rank_index
+from app.utils.cache import cached
+from app.utils.totals import TotalMode, count_total
 from app.utils.validate_ids import validate_doid, validate_nct, validate_pmid
-from app.utils.validate_query import validate_query_params
+from app.utils.validate_query import (
+    parse_fields,
+    select_fields,
+    validate_query_params,
+)
 
 router = APIRouter(prefix="/associations", tags=["associations"])
 
 
-def _join_where(where: list[str]) -> str:
-    # joining everything
+def join_where(where: list[str]) -> str:
+    # joining everything (shared with exports and the index advisor)
     where_sql = ""
     if len(where) > 0:
         where_sql = "WHERE " + " AND ".join(where)
     return where_sql
 
 
+def _any_of(
+    where: list[str],
+    params: Dict[str, Any],
+    column: str,
+    name: str,
+    values: list[str],
+) -> None:
+    # multi-valued filter, e.g. ?doid=DOID:1799&doid=DOID:162
+    where.append(f"{column} = ANY(:{name})")
+    params[name] = [v.strip() for v in values]
+
+
+# allow-lists for ?fields= (public name -> SQL expression)
+SUMMARY_FIELDS = {
+    name: name
+    for name in (
+        "doid",
+        "disease_name",
+        "tcrdtargetname",
+        "gene_symbol",
+        "uniprot",
+        "idgtdl",
+        "n_drugs",
+        "n_studies",
+        "n_publications",
+        "meanrankscore",
+        "meanrank",
+        "percentile_meanrank",
+    )
+}
+
+EVIDENCE_FIELDS = {
+    name: name
+    for name in (
+        "doid",
+        "disease_name",
+        "uniprot",
+        "gene_symbol",
+        "tcrdtargetname",
+        "idgtdl",
+        "nct_id",
+        "official_title",
+        "study_type",
+        "phase",
+        "overall_status",
+        "start_date",
+        "completion_date",
+        "enrollment",
+        "study_url",
+        "cid",
+        "molecule_chembl_id",
+        "drug_name",
+        "disease_target",
+    )
+}
+
+# evidence?shape=normalized: items are tuples of these ids, and the attributes
+# of each id are emitted once in a side dictionary (entity -> (id, attributes))
+EVIDENCE_ENTITIES = {
+    "diseases": ("doid", ("disease_name",)),
+    "targets": ("uniprot", ("gene_symbol", "tcrdtargetname", "idgtdl")),
+    "studies": (
+        "nct_id",
+        (
+            "official_title",
+            "study_type",
+            "phase",
+            "overall_status",
+            "start_date",
+            "completion_date",
+            "enrollment",
+            "study_url",
+        ),
+    ),
+    "drugs": ("molecule_chembl_id", ("cid", "drug_name")),
+}
+EVIDENCE_KEYS = tuple(key for key, _ in EVIDENCE_ENTITIES.values())
+EVIDENCE_NORMALIZED_FIELDS = EVIDENCE_KEYS + tuple(
+    name for _, attributes in EVIDENCE_ENTITIES.values() for name in attributes
+)
+
+PROVENANCE_FIELDS = {
+    "doid": "doid",
+    "uniprot": "uniprot",
+    "gene_symbol": "gene_symbol",
+    "nct_id": "nct_id",
+    "pmid": "pmid",
+    "citation": "citation",
+    # computed fields for API consistency
+    "disease_target": "doid || '_' || uniprot",
+    "pubmed_url": "CASE WHEN pmid IS NOT NULL THEN 'https://pubmed.ncbi.nlm.nih.gov/' || pmid || '/' END",
+}
+
+# ORDER BY of each paged endpoint (shared with exports and the index advisor)
+SUMMARY_ORDER_BY = "meanrankscore DESC NULLS LAST"
+EVIDENCE_ORDER_BY = "doid, uniprot, molecule_chembl_id, nct_id"
+PROVENANCE_ORDER_BY = "doid, uniprot, gene_symbol, nct_id, pmid NULLS LAST"
+
+# summary/top: top-k rows per group_by value, in a single windowed query
+SUMMARY_TOP_GROUPS = ("doid", "gene_symbol", "idgtdl")
+SUMMARY_TOP_RANK_BY = "meanrankscore DESC NULLS LAST, doid, uniprot"
+
+
+def summary_top_sql(select_sql: str, group_by: str, where_sql: str) -> str:
+    # group_by must be one of SUMMARY_TOP_GROUPS (it is inlined)
+    return f"""
+        SELECT *
+        FROM (
+            SELECT
+                {select_sql},
+                {group_by} AS group_key,
+                ROW_NUMBER() OVER (
+                    PARTITION BY {group_by}
+                    ORDER BY {SUMMARY_TOP_RANK_BY}
+                ) AS group_rank
+            FROM core.mv_disease_target_summary_plus
+            {where_sql}
+        ) ranked
+        WHERE group_rank <= :k
+        ORDER BY group_key, group_rank
+    """
+
+
+# provenance_summary?group_by=...: one row per group, with PMIDs/citations
+# aggregated in Postgres instead of one row per publication
+PROVENANCE_GROUPS = {
+    "disease_target": "doid, uniprot, gene_symbol",
+    "study": "doid, uniprot, gene_symbol, nct_id",
+}
+
+if IS_POSTGRES:
+    _PMIDS_AGG = (
+        "COALESCE(array_agg(DISTINCT pmid) FILTER (WHERE pmid IS NOT NULL), '{}')"
+    )
+    _PUBLICATIONS_AGG = f"""COALESCE(
+        jsonb_agg(DISTINCT jsonb_build_object(
+            'pmid', pmid,
+            'citation', citation,
+            'pubmed_url', {PROVENANCE_FIELDS["pubmed_url"]}
+        )) FILTER (WHERE pmid IS NOT NULL),
+        '[]'::jsonb
+    )"""
+else:
+    # DuckDB: lists of structs instead of Postgres arrays / jsonb
+    _PMIDS_AGG = "COALESCE(list(DISTINCT pmid) FILTER (WHERE pmid IS NOT NULL), [])"
+    _PUBLICATIONS_AGG = f"""COALESCE(
+        list(DISTINCT struct_pack(
+            pmid := pmid,
+            citation := citation,
+            pubmed_url := {PROVENANCE_FIELDS["pubmed_url"]}
+        )) FILTER (WHERE pmid IS NOT NULL),
+        []
+    )"""
+
+PROVENANCE_GROUPED_FIELDS = {
+    "disease_target": {
+        "doid": "doid",
+        "uniprot": "uniprot",
+        "gene_symbol": "gene_symbol",
+        "disease_target": PROVENANCE_FIELDS["disease_target"],
+        "n_studies": "COUNT(DISTINCT nct_id)",
+        "nct_ids": "array_agg(DISTINCT nct_id)",
+        "n_publications": "COUNT(DISTINCT pmid)",
+        "pmids": _PMIDS_AGG,
+        "publications": _PUBLICATIONS_AGG,
+    },
+    "study": {
+        "doid": "doid",
+        "uniprot": "uniprot",
+        "gene_symbol": "gene_symbol",
+        "nct_id": "nct_id",
+        "disease_target": PROVENANCE_FIELDS["disease_target"],
+        "n_publications": "COUNT(DISTINCT pmid)",
+        "pmids": _PMIDS_AGG,
+        "publications": _PUBLICATIONS_AGG,
+    },
+}
+
+
+def _doid_filter(
+    where: list[str], params: Dict[str, Any], doid: str, include_descendants: bool
+) -> None:
+    # exact doid, or its Disease Ontology subtree as a single = ANY(...)
+    if not include_descendants:
+        where.append("doid = :doid")
+        params["doid"] = doid
+        return
+    disease_ontology.require_ontology()
+    _any_of(
+        where,
+        params,
+        "doid",
+        "doids",
+        disease_ontology.get_ontology().descendants(doid),
+    )
+
+
+# filter builders, shared with the export jobs (app/routers/exports.py).
+# Each validates its inputs and returns (where clauses, bind params)
+def summary_filters(
+    doid: Optional[str] = None,
+    gene_symbol: Optional[str] = None,
+    uniprot: Optional[str] = None,
+    idgtdl: Optional[str] = None,
+    min_score: Optional[float] = None,
+    include_descendants: bool = False,
+) -> tuple[list[str], Dict[str, Any]]:
+    """
+    core.mv_disease_target_summary_plus
+    """
+
+    # Validating the input query
+    if doid:
+        doid = validate_doid(doid)
+
+    where = []
+    params: Dict[str, Any] = {}
+
+    # checking if there is any input given and put them in sql query
+    if doid:
+        _doid_filter(where, params, doid.strip(), include_descendants)
+    if gene_symbol:
+        where.append("gene_symbol = :gene_symbol")
+        params["gene_symbol"] = gene_symbol.strip()
+    if uniprot:
+        where.append("uniprot = :uniprot")
+        params["uniprot"] = uniprot.strip()
+    if idgtdl:
+        where.append("idgtdl = :idgtdl")
+        params["idgtdl"] = idgtdl.strip()
+    if min_score is not None:
+        where.append("meanrankscore >= :min_score")
+        params["min_score"] = float(min_score)
+
+    return where, params
+
+
+def evidence_filters(
+    doid: Optional[str] = None,
+    uniprot: Optional[str] = None,
+    disease_name: Optional[str] = None,
+    gene_symbol: Optional[str] = None,
+    molecule_chembl_id: Optional[str] = None,
+    nct_id: Optional[str] = None,
+    phase: Optional[str] = None,
+    overall_status: Optional[str] = None,
+    exclude_withdrawn: bool = False,
+    include_descendants: bool = False,
+) -> tuple[list[str], Dict[str, Any]]:
+    """
+    core.mv_tictac_associations
+    """
+
+    # Validating the input query
+    if doid:
+        doid = validate_doid(doid)
+    if nct_id:
+        nct_id = validate_nct(nct_id)
+
+    where = []
+    params: Dict[str, Any] = {}
+
+    # e.g.disease_target="DOID:1799_P41597".
+    # SELECT d.doid, t.uniprot_id FROM core.disease d JOIN core.disease_target dt ON dt.disease_id = d.disease_id JOIN core.target t ON t.target_id = dt.target_id WHERE d.doid = 'DOID:1799' LIMIT 5;
+
+    # disease target split into doid and uniprot
+    if doid:
+        _doid_filter(where, params, doid.strip(), include_descendants)
+
+    if uniprot:
+        where.append("uniprot = :uniprot")
+        params["uniprot"] = uniprot.strip()
+
+    # checking if there is any input given and put them in sql query
+    if disease_name:
+        where.append("disease_name ILIKE :disease_name")
+        params["disease_name"] = f"%{disease_name.strip()}%"
+    if gene_symbol:
+        where.append("gene_symbol = :gene_symbol")
+        params["gene_symbol"] = gene_symbol.strip()
+    if molecule_chembl_id:
+        where.append("molecule_chembl_id = :chembl")
+        params["chembl"] = molecule_chembl_id.strip()
+    if nct_id:
+        where.append("nct_id = :nct_id")
+        params["nct_id"] = nct_id.strip()
+    if phase:
+        where.append("phase ILIKE :phase")
+        params["phase"] = f"%{phase.strip()}%"
+    if overall_status:
+        where.append("UPPER(overall_status) = :overall_status")
+        params["overall_status"] = overall_status.strip().upper()
+    if exclude_withdrawn:
+        # excluding. total statuses:  ACTIVE_NOT_RECRUITING,APPROVED_FOR_MARKETING,AVAILABLE, COMPLETED, ENROLLING_BY_INVITATION,NO_LONGER_AVAILABLE,NOT_YET_RECRUITING,RECRUITING,SUSPENDED,TEMPORARILY_NOT_AVAILABLE,TERMINATED,UNKNOWN,WITHDRAWN
+        where.append("overall_status <> 'WITHDRAWN'")
+
+    return where, params
+
+
+def summary_top_filters(
+    doid: Optional[list[str]] = None,
+    gene_symbol: Optional[list[str]] = None,
+    idgtdl: Optional[list[str]] = None,
+    min_score: Optional[float] = None,
+) -> tuple[list[str], Dict[str, Any]]:
+    """
+    core.mv_disease_target_summary_plus (summary/top; repeatable filters)
+    """
+
+    # Validating the input query
+    if doid:
+        doid = [validate_doid(d) for d in doid]
+
+    where = []
+    params: Dict[str, Any] = {}
+
+    if doid:
+        _any_of(where, params, "doid", "doids", doid)
+    if gene_symbol:
+        _any_of(where, params, "gene_symbol", "gene_symbols", gene_symbol)
+    if idgtdl:
+        _any_of(where, params, "idgtdl", "idgtdls", idgtdl)
+    if min_score is not None:
+        where.append("meanrankscore >= :min_score")
+        params["min_score"] = float(min_score)
+
+    return where, params
+
+
+def provenance_filters(
+    doid: Optional[str] = None,
+    gene_symbol: Optional[str] = None,
+    uniprot: Optional[str] = None,
+    nct_id: Optional[str] = None,
+    pmid: Optional[str] = None,
+) -> tuple[list[str], Dict[str, Any]]:
+    """
+    core.mv_tictac_associations_summary
+    """
+
+    # Validating the input query
+    if doid:
+        doid = validate_doid(doid)
+    if nct_id:
+        nct_id = validate_nct(nct_id)
+    if pmid:
+        pmid = validate_pmid(pmid)
+
+    where = []
+    params: Dict[str, Any] = {}
+
+    # checking if there is any input given and put them in sql query
+    if doid:
+        where.append("doid = :doid")
+        params["doid"] = doid.strip()
+    if uniprot:
+        where.append("uniprot = :uniprot")
+        params["uniprot"] = uniprot.strip()
+    if gene_symbol:
+        where.append("gene_symbol = :gene_symbol")
+        params["gene_symbol"] = gene_symbol.strip()
+    if nct_id:
+        where.append("nct_id = :nct_id")
+        params["nct_id"] = nct_id.strip()
+    if pmid:
+        where.append("pmid = :pmid")
+        params["pmid"] = pmid.strip()
+
+    return where, params
+
+
 # /associations/summary endpoint
 @router.get(
     "/summary",
     summary="Ranked disease-target summary rows (main discovery surface)",
     description=(
         "Paginated list of disease-target pairs with metrics. "
-        "Optional filters: doid, gene_symbol, uniprot, idgtdl, min_score, limit, offset."
+        "Optional filters: doid, gene_symbol, uniprot, idgtdl, min_score, limit, offset. "
+        "include_descendants=true also matches every Disease Ontology descendant of doid. "
+        "fields: comma-separated subset of columns to return. "
+        "include_total: exact, estimate or capped (counts up to 10,001 rows)."
     ),
     dependencies=[
         Depends(
@@ -38,13 +425,17 @@ def _join_where(where: list[str]) -> str:
                     "uniprot",
                     "idgtdl",
                     "min_score",
+                    "include_descendants",
                     "limit",
                     "offset",
+                    "fields",
+                    "include_total",
                 }
             )
         )
     ],
 )
+@cached("associations.associations_summary", ttl=3600)
 def associations_summary(
     # important: doid input is following: e.g. DOID:1799
     doid: Optional[str] = None,
@@ -53,40 +444,25 @@ def associations_summary(
     # idgtdl
     idgtdl: Optional[str] = Query(default=None, description="Tclin/Tchem/Tbio/Tdark"),
     min_score: Optional[float] = None,
+    include_descendants: bool = False,
     limit: int = Query(default=100, ge=1, le=5000),
     offset: int = Query(default=0, ge=0),
+    fields: Optional[str] = Query(default=None, description="e.g. doid,uniprot"),
+    include_total: Optional[TotalMode] = None,
     db: Session = Depends(get_db),
 ):
     """
     core.mv_disease_target_summary_plus
     """
 
-    # Validating the input query
-    if doid:
-        doid = validate_doid(doid)
-
-    where = []
-    params: Dict[str, Any] = {"limit": limit, "offset": offset}
-
-    # checking if there is any input given and put them in sql query
-    if doid:
-        where.append("doid = :doid")
-        params["doid"] = doid.strip()
-    if gene_symbol:
-        where.append("gene_symbol = :gene_symbol")
-        params["gene_symbol"] = gene_symbol.strip()
-    if uniprot:
-        where.append("uniprot = :uniprot")
-        params["uniprot"] = uniprot.strip()
-    if idgtdl:
-        where.append("idgtdl = :idgtdl")
-        params["idgtdl"] = idgtdl.strip()
-    if min_score is not None:
-        where.append("meanrankscore >= :min_score")
-        params["min_score"] = float(min_score)
+    select_sql = select_fields(fields, SUMMARY_FIELDS)
+    where, params = summary_filters(
+        doid, gene_symbol, uniprot, idgtdl, min_score, include_descendants
+    )
+    params.update({"limit": limit, "offset": offset})
 
     # joining everything
-    where_sql = _join_where(where)
+    where_sql = join_where(where)
 
     # base_from
     base_from = f"""
@@ -101,24 +477,9 @@ def associations_summary(
                 text(
                     f"""
                 SELECT
-                    doid,
-                    disease_name,
-                    tcrdtargetname,
-                    gene_symbol,
-                    uniprot,
-                    idgtdl,
-
-
-                    n_drugs,
-                    n_studies,
-                    n_publications,
-
-
-                    meanrankscore,
-                    meanrank,
-                    percentile_meanrank
+                    {select_sql}
                 {base_from}
-                ORDER BY meanrankscore DESC NULLS LAST
+                ORDER BY {SUMMARY_ORDER_BY}
                 LIMIT :limit OFFSET :offset
                 """
                 ),
@@ -128,20 +489,221 @@ def associations_summary(
             .all()
         )
 
-        return {
+        out = {
             "limit": limit,
             "offset": offset,
             "items": list(rows),
         }
+        if include_total:
+            out.update(
+                count_total(
+                    db, include_total, base_from, params, "associations_summary"
+                )
+            )
+        return out
     except Exception as e:
         raise handle_database_error(e, "associations_summary")
 
 
+# /associations/summary/top endpoint
+@router.get(
+    "/summary/top",
+    summary="Top-k disease-target rows per disease, target or TDL",
+    description=(
+        "Top-k rows by meanrankscore for each group, computed in a single windowed query. "
+        "group_by: doid, gene_symbol or idgtdl. "
+        "Optional filters (repeatable): doid, gene_symbol, idgtdl; plus min_score. "
+        "fields: comma-separated subset of columns to return."
+    ),
+    dependencies=[
+        Depends(
+            validate_query_params(
+                {
+                    "group_by",
+                    "k",
+                    "doid",
+                    "gene_symbol",
+                    "idgtdl",
+                    "min_score",
+                    "fields",
+                }
+            )
+        )
+    ],
+)
+@cached("associations.associations_summary_top", ttl=3600)
+def associations_summary_top(
+    group_by: Literal["doid", "gene_symbol", "idgtdl"] = Query(
+        ..., description="Grouping key"
+    ),
+    k: int = Query(default=10, ge=1, le=100),
+    # repeat the parameter to restrict to several groups, e.g. ?doid=DOID:1799&doid=DOID:162
+    doid: Optional[list[str]] = Query(default=None),
+    gene_symbol: Optional[list[str]] = Query(default=None),
+    idgtdl: Optional[list[str]] = Query(default=None),
+    min_score: Optional[float] = None,
+    fields: Optional[str] = Query(default=None, description="e.g. doid,uniprot"),
+    db: Session = Depends(get_db),
+):
+    """
+    core.mv_disease_target_summary_plus
+    """
+
+    select_sql = select_fields(fields, SUMMARY_FIELDS)
+    where, params = summary_top_filters(doid, gene_symbol, idgtdl, min_score)
+    params["k"] = k
+
+    # joining everything
+    where_sql = join_where(where)
+
+    try:
+        # group_by is restricted to a Literal above, so it is safe to inline
+        rows = (
+            db.execute(text(summary_top_sql(select_sql, group_by, where_sql)), params)
+            .mappings()
+            .all()
+        )
+
+        groups = [
+            {
+                "key": key,
+                "items": [
+                    {k: v for k, v in row.items() if k != "group_key"} for row in items
+                ],
+            }
+            for key, items in groupby(rows, key=lambda row: row["group_key"])
+        ]
+
+        return {"group_by": group_by, "k": k, "groups": groups}
+    except Exception as e:
+        raise handle_database_error(e, "associations_summary_top")
+
+
+# /associations/rank endpoint
+@router.get(
+    "/rank",
+    summary="Disease-target rows re-ranked with custom weights and trial phases",
+    description=(
+        "Same rows as /associations/summary, with meanrank recomputed over the candidate set "
+        "as the weighted mean of the n_drugs, n_studies and n_publications ranks. "
+        "Weights: w_drugs, w_studies, w_publications (default 1 each). "
+        "phase (repeatable, e.g. PHASE3): only count studies in these phases; pairs without "
+        "such studies are dropped. "
+        "Optional filters: doid, gene_symbol, uniprot, idgtdl, min_score (on the recomputed score), "
+        "limit, offset, fields, include_total."
+    ),
+    dependencies=[
+        Depends(
+            validate_query_params(
+                {
+                    "w_drugs",
+                    "w_studies",
+                    "w_publications",
+                    "phase",
+                    "doid",
+                    "gene_symbol",
+                    "uniprot",
+                    "idgtdl",
+                    "min_score",
+                    "limit",
+                    "offset",
+                    "fields",
+                    "include_total",
+                }
+            )
+        )
+    ],
+)
+@cached("associations.associations_rank", ttl=3600)
+def associations_rank(
+    w_drugs: float = Query(default=1.0, ge=0),
+    w_studies: float = Query(default=1.0, ge=0),
+    w_publications: float = Query(default=1.0, ge=0),
+    # repeat the parameter to allow several phases, e.g. ?phase=PHASE3&phase=PHASE4
+    phase: Optional[list[str]] = Query(default=None),
+    doid: Optional[str] = None,
+    gene_symbol: Optional[str] = None,
+    uniprot: Optional[str] = None,
+    idgtdl: Optional[str] = Query(default=None, description="Tclin/Tchem/Tbio/Tdark"),
+    min_score: Optional[float] = None,
+    limit: int = Query(default=100, ge=1, le=5000),
+    offset: int = Query(default=0, ge=0),
+    fields: Optional[str] = Query(default=None, description="e.g. doid,uniprot"),
+    include_total: Optional[TotalMode] = None,
+):
+    """
+    In-memory rank index (app/indexes/ranking.py) over core.mv_disease_target_summary_plus,
+    core.mv_tictac_associations and core.mv_tictac_associations_summary
+    """
+
+    # Validating the input query
+    if doid:
+        doid = validate_doid(doid)
+    names = parse_fields(fields, SUMMARY_FIELDS)
+    weights = np.array([w_drugs, w_studies, w_publications])
+    if not weights.any():
+        raise HTTPException(
+            status_code=400, detail="At least one weight must be positive."
+        )
+    filters = {
+        column: value.strip()
+        for column, value in (
+            ("doid", doid),
+            ("gene_symbol", gene_symbol),
+            ("uniprot", uniprot),
+            ("idgtdl", idgtdl),
+        )
+        if value
+    }
+    phases = [p for p in phase or [] if p.strip()]
+
+    try:
+        index = get_rank_index()
+        ranking = index.rank(weights, phases, filters, min_score)
+        items = index.items(ranking, offset, offset + limit)
+    except Exception as e:
+        raise handle_database_error(e, "associations_rank")
+
+    out = {
+        "limit": limit,
+        "offset": offset,
+        "items": [{name: item[name] for name in names} for item in items],
+    }
+    if include_total:
+        # the whole candidate set is ranked anyway, so the total is always exact
+        out.update({"total": len(ranking["rows"]), "total_mode": "exact"})
+    return out
+
+
+def _normalize_evidence(rows: list, names: list[str]) -> Dict[str, Any]:
+    # evidence rows -> id tuples plus one side dictionary entry per entity
+    out: Dict[str, Any] = {
+        "columns": list(EVIDENCE_KEYS),
+        "items": [[row[key] for key in EVIDENCE_KEYS] for row in rows],
+    }
+    for entity, (key, attributes) in EVIDENCE_ENTITIES.items():
+        attributes = [name for name in attributes if name in names]
+        entries: Dict[str, Any] = {}
+        for row in rows:
+            if row[key] is not None and row[key] not in entries:
+                entries[row[key]] = {name: row[name] for name in attributes}
+        out[entity] = entries
+    return out
+
+
 # /associations/evidence endpoint
 @router.get(
     "/evidence",
     summary="Evidence-level rows linking disease-target-drug-study (main provenance surface)",
-    description="Paginated evidence rows including: DOID/name, UniProt/gene/TDL, drug (molecule_chembl_id, cid, drug_name), study (nct_id, title, phase, status, dates, enrollment, study_url)",
+    description=(
+        "Paginated evidence rows including: DOID/name, UniProt/gene/TDL, drug (molecule_chembl_id, cid, drug_name), study (nct_id, title, phase, status, dates, enrollment, study_url). "
+        "include_descendants=true also matches every Disease Ontology descendant of doid. "
+        "fields: comma-separated subset of columns to return. "
+        "shape=normalized returns items as [doid, uniprot, nct_id, molecule_chembl_id] tuples, "
+        "with the attributes of each disease, target, study and drug given once in side dictionaries "
+        "(fields then selects those attributes). "
+        "include_total: exact, estimate or capped (counts up to 10,001 rows)."
+    ),
     dependencies=[
         Depends(
             validate_query_params(
@@ -155,13 +717,18 @@ def associations_summary(
                     "phase",
                     "overall_status",
                     "exclude_withdrawn",
+                    "include_descendants",
                     "limit",
                     "offset",
+                    "fields",
+                    "shape",
+                    "include_total",
                 }
             )
         )
     ],
 )
+@cached("associations.associations_evidence", ttl=3600)
 def associations_evidence(
     # Disease target in the docs but using doid and uniprot
     doid: str | None = None,
@@ -173,60 +740,40 @@ def associations_evidence(
     phase: Optional[str] = None,
     overall_status: Optional[str] = None,
     exclude_withdrawn: bool = False,
+    include_descendants: bool = False,
     limit: int = Query(default=100, ge=1, le=5000),
     offset: int = Query(default=0, ge=0),
+    fields: Optional[str] = Query(default=None, description="e.g. doid,uniprot,nct_id"),
+    shape: Literal["rows", "normalized"] = "rows",
+    include_total: Optional[TotalMode] = None,
     db: Session = Depends(get_db),
 ):
     """
     core.mv_tictac_associations
     """
 
-    # Validating the input query
-    if doid:
-        doid = validate_doid(doid)
-    if nct_id:
-        nct_id = validate_nct(nct_id)
-
-    where = []
-    params: Dict[str, Any] = {"limit": limit, "offset": offset}
-
-    # e.g.disease_target="DOID:1799_P41597".
-    # SELECT d.doid, t.uniprot_id FROM core.disease d JOIN core.disease_target dt ON dt.disease_id = d.disease_id JOIN core.target t ON t.target_id = dt.target_id WHERE d.doid = 'DOID:1799' LIMIT 5;
-
-    # disease target split into doid and uniprot
-    if doid:
-        where.append("doid = :doid")
-        params["doid"] = doid.strip()
-
-    if uniprot:
-        where.append("uniprot = :uniprot")
-        params["uniprot"] = uniprot.strip()
-
-    # checking if there is any input given and put them in sql query
-    if disease_name:
-        where.append("disease_name ILIKE :disease_name")
-        params["disease_name"] = f"%{disease_name.strip()}%"
-    if gene_symbol:
-        where.append("gene_symbol = :gene_symbol")
-        params["gene_symbol"] = gene_symbol.strip()
-    if molecule_chembl_id:
-        where.append("molecule_chembl_id = :chembl")
-        params["chembl"] = molecule_chembl_id.strip()
-    if nct_id:
-        where.append("nct_id = :nct_id")
-        params["nct_id"] = nct_id.strip()
-    if phase:
-        where.append("phase ILIKE :phase")
-        params["phase"] = f"%{phase.strip()}%"
-    if overall_status:
-        where.append("UPPER(overall_status) = :overall_status")
-        params["overall_status"] = overall_status.strip().upper()
-    if exclude_withdrawn:
-        # excluding. total statuses:  ACTIVE_NOT_RECRUITING,APPROVED_FOR_MARKETING,AVAILABLE, COMPLETED, ENROLLING_BY_INVITATION,NO_LONGER_AVAILABLE,NOT_YET_RECRUITING,RECRUITING,SUSPENDED,TEMPORARILY_NOT_AVAILABLE,TERMINATED,UNKNOWN,WITHDRAWN
-        where.append("overall_status <> 'WITHDRAWN'")
+    if shape == "normalized":
+        # the ids are always selected, fields picks the side attributes
+        names = parse_fields(fields, EVIDENCE_NORMALIZED_FIELDS)
+        select_sql = ",\n".join(dict.fromkeys(EVIDENCE_KEYS + tuple(names)))
+    else:
+        select_sql = select_fields(fields, EVIDENCE_FIELDS)
+    where, params = evidence_filters(
+        doid,
+        uniprot,
+        disease_name,
+        gene_symbol,
+        molecule_chembl_id,
+        nct_id,
+        phase,
+        overall_status,
+        exclude_withdrawn,
+        include_descendants,
+    )
+    params.update({"limit": limit, "offset": offset})
 
     # joining everything
-    where_sql = _join_where(where)
+    where_sql = join_where(where)
 
     # base from
     base_from = f"""
@@ -240,27 +787,9 @@ def associations_evidence(
                 text(
                     f"""
                 SELECT
-                    doid,
-                    disease_name,
-                    uniprot,
-                    gene_symbol,
-                    tcrdtargetname,
-                    idgtdl,
-                    nct_id,
-                    official_title,
-                    study_type,
-                    phase,
-                    overall_status,
-                    start_date,
-                    completion_date,
-                    enrollment,
-                    study_url,
-                    cid,
-                    molecule_chembl_id,
-                    drug_name,
-                    disease_target
+                    {select_sql}
                 {base_from}
-                ORDER BY doid, uniprot, molecule_chembl_id, nct_id
+                ORDER BY {EVIDENCE_ORDER_BY}
                 LIMIT :limit OFFSET :offset
                 """
                 ),
@@ -270,7 +799,18 @@ def associations_evidence(
             .all()
         )
 
-        return {"limit": limit, "offset": offset, "items": list(rows)}
+        out = {"limit": limit, "offset": offset}
+        if shape == "normalized":
+            out.update({"shape": shape, **_normalize_evidence(rows, names)})
+        else:
+            out["items"] = list(rows)
+        if include_total:
+            out.update(
+                count_total(
+                    db, include_total, base_from, params, "associations_evidence"
+                )
+            )
+        return out
     except Exception as e:
         raise handle_database_error(e, "associations_evidence")
 
@@ -279,7 +819,12 @@ def associations_evidence(
 @router.get(
     "/provenance_summary",
     summary="Disease-target pairs with trial evidence and publication",
-    description="Endpoint which shows disease-target pairs that have linked clinical trials and publication (provenance)",
+    description=(
+        "Endpoint which shows disease-target pairs that have linked clinical trials and publication (provenance). "
+        "group_by: disease_target or study returns one row per group with PMIDs and citations aggregated into arrays. "
+        "fields: comma-separated subset of columns to return. "
+        "include_total: exact, estimate or capped (counts up to 10,001 rows)."
+    ),
     dependencies=[
         Depends(
             validate_query_params(
@@ -289,57 +834,58 @@ def associations_evidence(
                     "uniprot",
                     "nct_id",
                     "pmid",
+                    "group_by",
                     "limit",
                     "offset",
+                    "fields",
+                    "include_total",
                 }
             )
         )
     ],
 )
+@cached("associations.provenance_summary", ttl=3600)
 def provenance_summary(
     doid: str | None = None,
     gene_symbol: str | None = None,
     uniprot: str | None = None,
     nct_id: str | None = None,
     pmid: str | None = None,
+    group_by: Optional[Literal["disease_target", "study"]] = None,
     limit: int = Query(default=100, ge=1, le=5000),
     offset: int = Query(default=0, ge=0),
+    fields: Optional[str] = Query(default=None, description="e.g. doid,uniprot,pmid"),
+    include_total: Optional[TotalMode] = None,
     db: Session = Depends(get_db),
 ):
     """
     core.mv_tictac_associations_summary s
     """
 
-    # Validating the input query
-    if doid:
-        doid = validate_doid(doid)
-    if nct_id:
-        nct_id = validate_nct(nct_id)
-    if pmid:
-        pmid = validate_pmid(pmid)
-
-    where = []
-    params: Dict[str, Any] = {"limit": limit, "offset": offset}
-
-    # checking if there is any input given and put them in sql query
-    if doid:
-        where.append("doid = :doid")
-        params["doid"] = doid.strip()
-    if uniprot:
-        where.append("uniprot = :uniprot")
-        params["uniprot"] = uniprot.strip()
-    if gene_symbol:
-        where.append("gene_symbol = :gene_symbol")
-        params["gene_symbol"] = gene_symbol.strip()
-    if nct_id:
-        where.append("nct_id = :nct_id")
-        params["nct_id"] = nct_id.strip()
-    if pmid:
-        where.append("pmid = :pmid")
-        params["pmid"] = pmid.strip()
+    where, params = provenance_filters(doid, gene_symbol, uniprot, nct_id, pmid)
+    params.update({"limit": limit, "offset": offset})
 
     # joining everything
-    where_sql = _join_where(where)
+    where_sql = join_where(where)
+
+    if group_by:
+        # group_by is restricted to a Literal above, so it is safe to inline
+        select_sql = select_fields(fields, PROVENANCE_GROUPED_FIELDS[group_by])
+        order_by = PROVENANCE_GROUPS[group_by]
+        base_from = f"""
+            FROM core.mv_tictac_associations_summary
+            {where_sql}
+            GROUP BY {PROVENANCE_GROUPS[group_by]}
+        """
+        count_from = f"FROM (SELECT 1 {base_from}) grouped"
+    else:
+        select_sql = select_fields(fields, PROVENANCE_FIELDS)
+        order_by = PROVENANCE_ORDER_BY
+        base_from = f"""
+            FROM core.mv_tictac_associations_summary
+            {where_sql}
+        """
+        count_from = base_from
 
     try:
         # provenance
@@ -348,15 +894,9 @@ def provenance_summary(
                 text(
                     f"""
                 SELECT
-                    doid,
-                    uniprot,
-                    gene_symbol,
-                    nct_id,
-                    pmid,
-                    citation
-                FROM core.mv_tictac_associations_summary
-                {where_sql}
-                ORDER BY doid, uniprot, gene_symbol, nct_id, pmid NULLS LAST
+                    {select_sql}
+                {base_from}
+                ORDER BY {order_by}
                 LIMIT :limit OFFSET :offset
                 """
                 ),
@@ -366,23 +906,75 @@ def provenance_summary(
             .all()
         )
 
-        # Add computed fields for API consistency
-        items = []
-        for row in rows:
-            item = dict(row)
-            item["disease_target"] = f"{row['doid']}_{row['uniprot']}"
-            item["pubmed_url"] = (
-                f"https://pubmed.ncbi.nlm.nih.gov/{row['pmid']}/"
-                if row["pmid"]
-                else None
-            )
-            items.append(item)
-
-        return {
+        # computed fields (disease_target, pubmed_url, publications) are built in SQL
+        out = {
             "limit": limit,
             "offset": offset,
-            "items": items,
+            "items": list(rows),
         }
+        if include_total:
+            out.update(
+                count_total(
+                    db,
+                    include_total,
+                    count_from,
+                    params,
+                    f"provenance_summary:{group_by or 'row'}",
+                )
+            )
+        return out
 
     except Exception as e:
         raise handle_database_error(e, "provenance_summary")
+
+
+# /associations/changes endpoint
+@router.get(
+    "/changes",
+    summary="Rows added, modified or removed since a data generation (NDJSON stream)",
+    description=(
+        "Incremental sync: compares per-generation manifests of row hashes keyed by the natural key "
+        "(evidence: doid, uniprot, molecule_chembl_id, nct_id; summary: doid, uniprot) and streams one JSON object per line: "
+        '{"op": "removed", "key": {...}} or {"op": "added" | "modified", "key": {...}, "row": {...}}. '
+        "Changes are per key: a key can have several rows (the evidence view has duplicate keys), and "
+        "an added or modified key is sent with one line per current row, so apply a modified key by "
+        "replacing every stored row with that key by those rows. "
+        "since: a generation listed by /meta/generation (X-To-Generation of the previous sync). "
+        "Counts (of keys) are returned in the X-Changes-Added/Modified/Removed headers. "
+        "503 while the manifest of the current generation is being built."
+    ),
+    dependencies=[Depends(validate_query_params({"since", "dataset"}))],
+)
+def associations_changes(
+    since: str = Query(..., description="Data generation last synced"),
+    dataset: Literal["evidence", "summary"] = "evidence",
+):
+    try:
+        generation = current_generation()
+    except Exception as e:
+        raise handle_database_error(e, "associations_changes")
+
+    if since != generation and read_meta(since) is None:
+        raise HTTPException(
+            status_code=404, detail="No manifest for that data generation."
+        )
+    if not ensure_manifest(generation):
+        raise HTTPException(
+            status_code=503,
+            detail="The manifest of the current data generation is being built. Retry later.",
+            headers={"Retry-After": "60"},
+        )
+
+    changes = diff(since, generation, dataset)
+    headers = {
+        "X-From-Generation": since,
+        "X-To-Generation": generation,
+        "X-Changes-Added": str(len(changes["added"])),
+        "X-Changes-Modified": str(len(changes["modified"])),
+        "X-Changes-Removed": str(len(changes["removed"])),
+    }
+    return StreamingResponse(
+        stream_changes(dataset, changes),
+        media_type="application/x-ndjson",
+        headers=headers,
+    )
@@ -1,16 +1,26 @@
 # app/routers/diseases.py
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from app.core.exceptions import handle_database_error
 from app.db.database import get_db
+from app.indexes.disease_ontology import get_ontology, require_ontology
+from app.indexes.similarity import SimilarityMetric, get_index
 
-from app.utils.validate_query import validate_query_params
+from app.utils.cache import cached
+from app.utils.validate_query import select_fields, validate_query_params
+from app.utils.validate_ids import validate_doid
 
 
 router = APIRouter(prefix="/diseases", tags=["diseases"])
 
+# allow-list for ?fields= on /diseases/search
+SEARCH_FIELDS = {
+    "doid": "d.doid",
+    "disease_name": "d.preferred_name",
+}
+
 
 # /diseases/search
 @router.get(
@@ -23,19 +33,23 @@ router = APIRouter(prefix="/diseases", tags=["diseases"])
                 {
                     "q",
                     "limit",
+                    "fields",
                 }
             )
         )
     ],
 )
+@cached("diseases.search_diseases")
 def search_diseases(
     q: str = Query(..., description="Substring search"),
     limit: int = Query(default=20, ge=1, le=100),
+    fields: str | None = Query(default=None, description="e.g. doid"),
     db: Session = Depends(get_db),
 ):
     """
     core.disease d
     """
+    select_sql = select_fields(fields, SEARCH_FIELDS)
 
     # IMPORTANT: so just assuming for this one we are doing searches both disease name OR DOID because docs doesnt specify how to lookup
 
@@ -44,10 +58,9 @@ def search_diseases(
         rows = (
             db.execute(
                 text(
-                    """
+                    f"""
                 SELECT
-                    d.doid,
-                    d.preferred_name AS disease_name
+                    {select_sql}
 
                 FROM core.disease d
                 WHERE d.preferred_name ILIKE :q
@@ -66,3 +79,101 @@ def search_diseases(
         return list(rows)
     except Exception as e:
         raise handle_database_error(e, "search_diseases")
+
+
+# /diseases/{doid}/similar
+@router.get(
+    "/{doid}/similar",
+    summary="Diseases sharing targets with a disease",
+    description=(
+        "Top-N diseases by Jaccard or cosine similarity of their target sets, "
+        "from an in-memory disease x target incidence matrix"
+    ),
+    dependencies=[Depends(validate_query_params({"metric", "limit"}))],
+)
+def similar_diseases(
+    doid: str,
+    metric: SimilarityMetric = Query(default="jaccard"),
+    limit: int = Query(default=20, ge=1, le=100),
+):
+    # e.g. DOID:1612
+    doid = validate_doid(doid)
+    try:
+        result = get_index().similar_diseases(doid, metric, limit)
+    except Exception as e:
+        raise handle_database_error(e, "similar_diseases")
+
+    if result is None:
+        raise HTTPException(status_code=404, detail="Disease not found.")
+    return result
+
+
+# evidence counts per subtree: s maps each subtree root to the doids in it
+SUBTREE_COUNTS_SQL = """
+    SELECT
+        s.subtree,
+        COUNT(DISTINCT a.doid) AS diseases,
+        COUNT(DISTINCT a.uniprot) AS targets,
+        COUNT(DISTINCT a.molecule_chembl_id) AS drugs,
+        COUNT(DISTINCT a.nct_id) AS studies,
+        COUNT(*) AS evidence_rows
+    FROM (SELECT unnest(:subtrees) AS subtree, unnest(:doids) AS doid) s
+    JOIN core.mv_tictac_associations a ON a.doid = s.doid
+    GROUP BY s.subtree
+"""
+
+SUBTREE_COUNTS = ("diseases", "targets", "drugs", "studies", "evidence_rows")
+
+
+# /diseases/{doid}/descendants
+@router.get(
+    "/{doid}/descendants",
+    summary="Disease Ontology subtree of a disease with evidence counts",
+    description=(
+        "Evidence counts (diseases, targets, drugs, studies, evidence rows) aggregated over the "
+        "Disease Ontology subtree of a disease and over the subtree of each of its direct children. "
+        "Use include_descendants=true on /associations/summary or /associations/evidence to list the rows"
+    ),
+    dependencies=[Depends(validate_query_params(set()))],
+)
+@cached("diseases.disease_descendants", ttl=3600)
+def disease_descendants(doid: str, db: Session = Depends(get_db)):
+    # e.g. DOID:162 (cancer)
+    doid = validate_doid(doid)
+    require_ontology()
+    ontology = get_ontology()
+    term = ontology.resolve(doid)
+    if term is None:
+        raise HTTPException(status_code=404, detail="Disease not found.")
+
+    subtrees = {
+        root: ontology.descendants(root) for root in [term, *ontology.children[term]]
+    }
+    try:
+        rows = db.execute(
+            text(SUBTREE_COUNTS_SQL),
+            {
+                "subtrees": [root for root, doids in subtrees.items() for _ in doids],
+                "doids": [d for doids in subtrees.values() for d in doids],
+            },
+        ).mappings()
+        counts = {row["subtree"]: row for row in rows}
+    except Exception as e:
+        raise handle_database_error(e, "disease_descendants")
+
+    def subtree(root: str) -> dict:
+        return {
+            "doid": root,
+            "disease_name": ontology.names[root],
+            "terms": sum(1 for d in subtrees[root] if d in ontology.names),
+            **{
+                name: counts[root][name] if root in counts else 0
+                for name in SUBTREE_COUNTS
+            },
+        }
+
+    children = sorted(
+        (subtree(child) for child in ontology.children[term]),
+        key=lambda child: (-child["evidence_rows"], child["doid"]),
+    )
+    return {**subtree(term), "children": children}
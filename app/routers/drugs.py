@@ -1,66 +1,61 @@
 # app/routers/drugs.py
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import text
 
 from app.core.exceptions import handle_database_error
-from app.db.database import get_db
+from app.indexes.drug_names import get_index
 
-from app.utils.validate_query import validate_query_params
+from app.utils.validate_query import parse_fields, validate_query_params
 
 
 router = APIRouter(prefix="/drugs", tags=["drugs"])
 
+# allow-list for ?fields= on /drugs/search
+SEARCH_FIELDS = (
+    "molecule_chembl_id",
+    "cid",
+    "drug_name",
+    "matched_name",
+    "match",
+    "similarity",
+)
+
 
 # drugs/search endpoint
 @router.get(
     "/search",
     summary="Typeahead / lookup for drugs",
-    description="Typeahead / lookup for drugs",
+    description=(
+        "Typeahead / lookup for drugs by any synonym or ChEMBL id. "
+        "One result per drug with its preferred name (drug_name) and the name that matched (matched_name), "
+        "ranked by match: exact, prefix, substring, then trigram similarity. "
+        "Served from an in-memory name index."
+    ),
     dependencies=[
         Depends(
             validate_query_params(
                 {
                     "q",
                     "limit",
+                    "fields",
                 }
             )
         )
     ],
 )
 def search_drugs(
-    q: str = Query(..., description="Drug name substring"),
+    q: str = Query(..., description="Drug name, synonym or ChEMBL id (or part of one)"),
     limit: int = Query(default=20, ge=1, le=100),
-    db: Session = Depends(get_db),
+    fields: str | None = Query(default=None, description="e.g. molecule_chembl_id"),
 ):
     """
     core.drug d
     core.drug_name dn
     """
+    names = parse_fields(fields, SEARCH_FIELDS)
 
     try:
-        rows = (
-            db.execute(
-                text(
-                    """
-                SELECT
-                    d.molecule_chembl_id,
-                    d.cid,
-                    dn.drug_name
-                FROM core.drug d
-                JOIN core.drug_name dn ON dn.drug_id = d.drug_id
-                WHERE dn.is_preferred = true
-                  AND dn.drug_name ILIKE :q
-                ORDER BY dn.drug_name
-                LIMIT :limit
-                """
-                ),
-                {"q": f"%{q.strip()}%", "limit": limit},
-            )
-            .mappings()
-            .all()
-        )
-
-        return list(rows)
+        items = get_index().search(q, limit)
     except Exception as e:
         raise handle_database_error(e, "search_drugs")
+
+    return [{name: item[name] for name in names} for item in items]
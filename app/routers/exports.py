@@ -0,0 +1,410 @@
+# app/routers/exports.py
+import csv
+import fcntl
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from sqlalchemy import text
+
+from app.core.config import EXPORT_DIR, EXPORT_WORKERS
+from app.core.exceptions import handle_database_error
+from app.db.database import SessionLocal
+from app.db.generation import current_generation
+from app.models.export import ExportRequest
+from app.routers.associations import (
+    EVIDENCE_FIELDS,
+    EVIDENCE_ORDER_BY,
+    PROVENANCE_FIELDS,
+    PROVENANCE_ORDER_BY,
+    SUMMARY_FIELDS,
+    SUMMARY_ORDER_BY,
+    evidence_filters,
+    join_where,
+    provenance_filters,
+    summary_filters,
+)
+from app.utils.totals import count_total
+from app.utils.validate_query import select_fields, validate_query_params
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/exports", tags=["exports"])
+
+# job ids are a hash prefix of (generation, final SQL, bind params)
+EXPORT_ID_RE = re.compile(r"^[0-9a-f]{20}$")
+
+# rows fetched from the server-side cursor per batch (also the progress granularity)
+BATCH_SIZE = 5000
+
+# filters accepted per dataset (same as the matching /associations endpoint)
+SUMMARY_FILTERS = {
+    "doid",
+    "gene_symbol",
+    "uniprot",
+    "idgtdl",
+    "min_score",
+    "include_descendants",
+}
+EVIDENCE_FILTERS = {
+    "doid",
+    "uniprot",
+    "disease_name",
+    "gene_symbol",
+    "molecule_chembl_id",
+    "nct_id",
+    "phase",
+    "overall_status",
+    "exclude_withdrawn",
+    "include_descendants",
+}
+PROVENANCE_FILTERS = {"doid", "gene_symbol", "uniprot", "nct_id", "pmid"}
+DATASET_FILTERS = {
+    "summary": SUMMARY_FILTERS,
+    "evidence": EVIDENCE_FILTERS,
+    "provenance": PROVENANCE_FILTERS,
+    "evidence_provenance": EVIDENCE_FILTERS,
+}
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_stopping = threading.Event()
+
+
+def export_query(spec: ExportRequest) -> tuple[str, str, Dict[str, Any]]:
+    """
+    Build (select sql, "FROM ... WHERE ..." for the row estimate, params) for a job.
+    Raises 400 for filters that don't apply to the dataset.
+    """
+    filters = spec.model_dump(exclude_defaults=True, exclude={"dataset"})
+    extra = set(filters) - DATASET_FILTERS[spec.dataset]
+    if extra:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid filters for {spec.dataset}: {', '.join(sorted(extra))}",
+        )
+
+    if spec.dataset == "summary":
+        where, params = summary_filters(**filters)
+        from_sql = f"FROM core.mv_disease_target_summary_plus {join_where(where)}"
+        sql = f"""
+            SELECT {select_fields(None, SUMMARY_FIELDS)}
+            {from_sql}
+            ORDER BY {SUMMARY_ORDER_BY}
+        """
+    elif spec.dataset == "provenance":
+        where, params = provenance_filters(**filters)
+        from_sql = f"FROM core.mv_tictac_associations_summary {join_where(where)}"
+        sql = f"""
+            SELECT {select_fields(None, PROVENANCE_FIELDS)}
+            {from_sql}
+            ORDER BY {PROVENANCE_ORDER_BY}
+        """
+    else:
+        where, params = evidence_filters(**filters)
+        from_sql = f"FROM core.mv_tictac_associations {join_where(where)}"
+        order_by = EVIDENCE_ORDER_BY
+        sql = f"""
+            SELECT {select_fields(None, EVIDENCE_FIELDS)}
+            {from_sql}
+        """
+
+        if spec.dataset == "evidence_provenance":
+            # filter the evidence rows first, then attach their publications
+            # (pmid only exists on p, so the pubmed_url expression is unambiguous)
+            from_sql = f"""
+                FROM ({sql}) e
+                LEFT JOIN core.mv_tictac_associations_summary p
+                  ON p.doid = e.doid AND p.uniprot = e.uniprot AND p.nct_id = e.nct_id
+            """
+            sql = f"""
+                SELECT
+                    e.*,
+                    p.pmid,
+                    p.citation,
+                    {PROVENANCE_FIELDS["pubmed_url"]} AS pubmed_url
+                {from_sql}
+            """
+            order_by = "e.doid, e.uniprot, e.molecule_chembl_id, e.nct_id, p.pmid"
+
+        sql += f" ORDER BY {order_by}"
+
+    return sql, from_sql, params
+
+
+def _job_dir(export_id: str) -> str:
+    return os.path.join(EXPORT_DIR, export_id)
+
+
+def _result_path(export_id: str) -> str:
+    return os.path.join(_job_dir(export_id), "result.csv.gz")
+
+
+def _read_status(export_id: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(_job_dir(export_id), "status.json")) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _write_status(export_id: str, status: Dict[str, Any]) -> None:
+    # write-then-rename so readers in other workers never see a partial file
+    status["updated_at"] = time.time()
+    path = os.path.join(_job_dir(export_id), "status.json")
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}"
+    with open(tmp, "w") as f:
+        json.dump(status, f)
+    os.replace(tmp, path)
+
+
+def _try_lock(export_id: str) -> Optional[int]:
+    """
+    Take the job's lock file. The owning process holds it until the job ends,
+    and the OS drops it if that process dies, so a free lock on an unfinished
+    job means the job was interrupted. Returns the fd, or None if held elsewhere.
+    """
+    fd = os.open(
+        os.path.join(_job_dir(export_id), "lock"), os.O_CREAT | os.O_RDWR, 0o644
+    )
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _unlock(fd: int) -> None:
+    fcntl.flock(fd, fcntl.LOCK_UN)
+    os.close(fd)
+
+
+def _is_done(status: Optional[Dict[str, Any]], export_id: str) -> bool:
+    return (
+        status is not None
+        and status["status"] == "done"
+        and os.path.exists(_result_path(export_id))
+    )
+
+
+def _prune(generation: str) -> None:
+    # results from older data generations can't be reused; drop the idle ones
+    if not os.path.isdir(EXPORT_DIR):
+        return
+    for export_id in os.listdir(EXPORT_DIR):
+        status = _read_status(export_id)
+        if status is None or status["generation"] == generation:
+            continue
+        fd = _try_lock(export_id)
+        if fd is not None:
+            shutil.rmtree(_job_dir(export_id), ignore_errors=True)
+            _unlock(fd)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=EXPORT_WORKERS, thread_name_prefix="export"
+            )
+        return _executor
+
+
+def shutdown_exports() -> None:
+    """
+    Stop the worker pool (called on app shutdown). Running jobs stop at their
+    next batch and are marked failed; queued ones are dropped.
+    """
+    _stopping.set()
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _run(export_id: str, query: tuple[str, str, Dict[str, Any]], lock_fd: int):
+    sql, from_sql, params = query
+    status = _read_status(export_id)
+    part = f"{_result_path(export_id)}.part"
+    db = SessionLocal()
+
+    try:
+        status["status"] = "running"
+        status["started_at"] = time.time()
+        status["rows_estimated"] = count_total(
+            db, "estimate", from_sql, params, "exports"
+        )["total"]
+        _write_status(export_id, status)
+
+        # server-side cursor, so memory stays flat regardless of export size
+        result = db.execute(
+            text(sql),
+            params,
+            execution_options={"stream_results": True, "yield_per": BATCH_SIZE},
+        )
+        with gzip.open(part, "wt", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(result.keys())
+            for rows in result.partitions():
+                if _stopping.is_set():
+                    raise RuntimeError("interrupted by shutdown")
+                writer.writerows(rows)
+                status["rows_written"] += len(rows)
+                status["progress"] = min(
+                    status["rows_written"] / max(status["rows_estimated"], 1), 0.99
+                )
+                _write_status(export_id, status)
+
+        os.replace(part, _result_path(export_id))
+        status["status"] = "done"
+        status["progress"] = 1.0
+        status["size_bytes"] = os.path.getsize(_result_path(export_id))
+        status["finished_at"] = time.time()
+        _write_status(export_id, status)
+    except Exception as e:
+        logger.error(
+            f"Export {export_id} failed: {type(e).__name__}: {e}", exc_info=True
+        )
+        status["status"] = "failed"
+        status["error"] = "Export failed. Please resubmit."
+        status["finished_at"] = time.time()
+        _write_status(export_id, status)
+    finally:
+        db.close()
+        if os.path.exists(part):
+            os.remove(part)
+        _unlock(lock_fd)
+
+
+def submit_export(spec: ExportRequest) -> Dict[str, Any]:
+    """
+    Queue an export, or return the existing job for the same spec in the
+    current data generation.
+    """
+    query = export_query(spec)
+    generation = current_generation()
+
+    # the final SQL, not just its params: some filters (exclude_withdrawn)
+    # add a condition without a bind param
+    key = json.dumps(
+        {"generation": generation, "sql": query[0], "params": query[2]},
+        sort_keys=True,
+        default=str,
+    )
+    export_id = hashlib.sha256(key.encode()).hexdigest()[:20]
+
+    status = _read_status(export_id)
+    if _is_done(status, export_id):
+        return status
+
+    os.makedirs(_job_dir(export_id), exist_ok=True)
+    lock_fd = _try_lock(export_id)
+    if lock_fd is None:
+        # queued or running in some worker
+        return _read_status(export_id) or {"id": export_id, "status": "queued"}
+
+    # re-check now that we hold the lock: another worker may have just finished it
+    status = _read_status(export_id)
+    if _is_done(status, export_id):
+        _unlock(lock_fd)
+        return status
+
+    _prune(generation)
+
+    status = {
+        "id": export_id,
+        "status": "queued",
+        "dataset": spec.dataset,
+        "filters": spec.model_dump(exclude_defaults=True, exclude={"dataset"}),
+        "generation": generation,
+        "created_at": time.time(),
+        "rows_written": 0,
+        "rows_estimated": None,
+        "progress": 0.0,
+    }
+    _write_status(export_id, status)
+    _get_executor().submit(_run, export_id, query, lock_fd)
+    return status
+
+
+def export_status(export_id: str) -> Dict[str, Any]:
+    if not EXPORT_ID_RE.match(export_id):
+        raise HTTPException(400, "Invalid export id format")
+
+    status = _read_status(export_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Export not found.")
+
+    if status["status"] in ("queued", "running"):
+        # nobody holds the lock -> the owning worker died mid-job
+        lock_fd = _try_lock(export_id)
+        if lock_fd is not None:
+            status["status"] = "failed"
+            status["error"] = "Export was interrupted. Please resubmit."
+            _write_status(export_id, status)
+            _unlock(lock_fd)
+
+    return status
+
+
+# POST /exports endpoint
+@router.post(
+    "",
+    status_code=202,
+    summary="Start an asynchronous export of an associations dataset",
+    description=(
+        "Queues a background export to a gzip-compressed CSV file. "
+        "dataset: summary, evidence, provenance or evidence_provenance (evidence rows joined with their publications). "
+        "Filters are the same as the matching /associations endpoint. "
+        "Identical requests within one data generation return the same job."
+    ),
+    dependencies=[Depends(validate_query_params(set()))],
+)
+def create_export(spec: ExportRequest):
+    try:
+        return submit_export(spec)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise handle_database_error(e, "create_export")
+
+
+# /exports/{export_id} endpoint
+@router.get(
+    "/{export_id}",
+    summary="Export job status and progress",
+    description="Status (queued, running, done, failed), rows written, estimated rows and progress",
+    dependencies=[Depends(validate_query_params(set()))],
+)
+def get_export(export_id: str):
+    return export_status(export_id)
+
+
+# /exports/{export_id}/download endpoint
+@router.get(
+    "/{export_id}/download",
+    summary="Download a finished export (supports HTTP Range for resuming)",
+    description="gzip-compressed CSV. Interrupted downloads can be resumed with a Range header.",
+    dependencies=[Depends(validate_query_params(set()))],
+)
+def download_export(export_id: str):
+    status = export_status(export_id)
+    if not _is_done(status, export_id):
+        raise HTTPException(status_code=409, detail="Export is not finished.")
+
+    # FileResponse handles Range / If-Range requests
+    return FileResponse(
+        _result_path(export_id),
+        media_type="application/gzip",
+        filename=f"tictac_{status['dataset']}_{export_id}.csv.gz",
+    )
@@ -1,10 +1,14 @@
 # app/routers/meta.py
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from app.core.exceptions import handle_database_error
-from app.db.database import get_db
+from app.core.warmup import readiness
+from app.db.database import IS_POSTGRES, get_db
+from app.db.generation import current_generation
+from app.db.manifests import available_generations, ensure_manifest
+from app.utils.cache import cached
 
 
 router = APIRouter(prefix="/meta", tags=["meta"])
@@ -20,12 +24,51 @@ def health():
     return {"status": "ok"}
 
 
+# /meta/ready endpoint
+@router.get(
+    "/ready",
+    summary="Readiness check (warmed up, database reachable)",
+    description=(
+        "Whether this worker has finished its startup warm-up (connection pool, materialized views, "
+        "in-memory indexes) and can reach the database, with per-step warm-up timings in seconds. "
+        "Returns 503 until ready; /meta/health only reports that the service is up."
+    ),
+)
+def ready(response: Response):
+    state = readiness()
+    if not state["ready"]:
+        response.status_code = 503
+    return state
+
+
+# /meta/generation endpoint
+@router.get(
+    "/generation",
+    summary="Current data generation and the generations /associations/changes can diff from",
+    description=(
+        "generation identifies the data currently served (it changes when a new tictac_db is restored). "
+        "manifests lists generations usable as /associations/changes?since=, newest first"
+    ),
+)
+def data_generation():
+    try:
+        current = current_generation()
+    except Exception as e:
+        raise handle_database_error(e, "data_generation")
+    return {
+        "generation": current,
+        "manifest_ready": ensure_manifest(current),
+        "manifests": available_generations(),
+    }
+
+
 # /meta/counts endpoint
 @router.get(
     "/counts",
     summary="High-level dataset counts (sanity + UX)",
     description="Counts for diseases, targets, drugs, studies, publications, evidence rows, and materialized views",
 )
+@cached("meta.counts", ttl=3600)
 def counts(db: Session = Depends(get_db)):
     try:
         # counts
@@ -45,8 +88,14 @@ def counts(db: Session = Depends(get_db)):
         ).scalar_one()
 
         # mv (i think its correct becasue its showing 3. \dm core.*  )
+        # (DuckDB snapshots store the materialized views as mv_* tables)
         mv_count = db.execute(
-            text("SELECT COUNT(*) FROM pg_matviews WHERE schemaname = 'core'")
+            text(
+                "SELECT COUNT(*) FROM pg_matviews WHERE schemaname = 'core'"
+                if IS_POSTGRES
+                else "SELECT COUNT(*) FROM information_schema.tables "
+                "WHERE table_schema = 'core' AND starts_with(table_name, 'mv_')"
+            )
         ).scalar_one()
 
         return {
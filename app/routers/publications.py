@@ -1,11 +1,13 @@
 # app/routers/publications.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from app.core.exceptions import handle_database_error
-from app.db.database import get_db
+from app.db.database import get_db, require_postgres
+from app.db.schema import PUBLICATION_DOCUMENT
 
+from app.utils.cache import cached
 from app.utils.validate_query import validate_query_params
 from app.utils.validate_ids import validate_pmid
 
@@ -13,6 +15,65 @@ from app.utils.validate_ids import validate_pmid
 router = APIRouter(prefix="/publications", tags=["publications"])
 
 
+# /publications/fulltext endpoint (declared before /{pmid} so it isn't captured by it)
+@router.get(
+    "/fulltext",
+    summary="Ranked full-text search over publication citations",
+    description=(
+        "Full-text search over citations, ordered by ts_rank. "
+        'Supports web-search syntax: "quoted phrases", OR, and -exclusions. '
+        "Returns a highlighted snippet of the citation."
+    ),
+    dependencies=[Depends(validate_query_params({"q", "limit", "offset"}))],
+)
+@cached("publications.fulltext_publications")
+def fulltext_publications(
+    q: str = Query(..., description='e.g. "tumour growth"'),
+    limit: int = Query(default=20, ge=1, le=100),
+    offset: int = Query(default=0, ge=0),
+    db: Session = Depends(get_db),
+):
+    """
+    core.publication (publication_fulltext_idx)
+    """
+    require_postgres("Full-text search")
+
+    try:
+        rows = (
+            db.execute(
+                text(
+                    f"""
+                SELECT
+                    pmid,
+                    citation,
+                    pubmed_url,
+
+                    ts_rank({PUBLICATION_DOCUMENT}, query) AS rank,
+                    ts_headline(
+                        'english',
+                        coalesce(citation, ''),
+                        query,
+                        'StartSel=<b>, StopSel=</b>, MaxFragments=2, MaxWords=20, MinWords=5'
+                    ) AS snippet
+
+                FROM core.publication
+                CROSS JOIN websearch_to_tsquery('english', :q) AS query
+                WHERE {PUBLICATION_DOCUMENT} @@ query
+                ORDER BY rank DESC, pmid
+                LIMIT :limit OFFSET :offset
+                """
+                ),
+                {"q": q.strip(), "limit": limit, "offset": offset},
+            )
+            .mappings()
+            .all()
+        )
+
+        return list(rows)
+    except Exception as e:
+        raise handle_database_error(e, "fulltext_publications")
+
+
 # /router/publications/{pmid} endpoint
 @router.get(
     "/{pmid}",
@@ -20,6 +81,7 @@ router = APIRouter(prefix="/publications", tags=["publications"])
     description="Publication details + PubMed link-out",
     dependencies=[Depends(validate_query_params(set()))],
 )
+@cached("publications.get_publication", ttl=3600)
 def get_publication(pmid: str, db: Session = Depends(get_db)):
     """ """
     pmid = validate_pmid(pmid)
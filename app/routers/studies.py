@@ -6,40 +6,46 @@ from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from app.core.exceptions import handle_database_error
-from app.db.database import get_db
+from app.db.database import get_db, require_postgres
+from app.db.schema import STUDY_DOCUMENT
 
-from app.utils.validate_query import validate_query_params
+from app.utils.cache import cached
+from app.utils.validate_query import select_fields, validate_query_params
 from app.utils.validate_ids import validate_nct
 
 
 router = APIRouter(prefix="/studies", tags=["studies"])
 
+# allow-list for ?fields= on /studies/search
+SEARCH_FIELDS = {
+    name: name
+    for name in ("nct_id", "official_title", "overall_status", "phase", "study_url")
+}
+
 
 # /studies/search endpoint
 @router.get(
     "/search",
     summary="Typeahead / lookup for studies",
     description="Typeahead / lookup for studies",
-    dependencies=[Depends(validate_query_params({"q", "limit"}))],
+    dependencies=[Depends(validate_query_params({"q", "limit", "fields"}))],
 )
+@cached("studies.search_studies")
 def search_studies(
     q: str = Query(..., description="NCT or title substring"),
     limit: int = Query(default=20, ge=1, le=100),
+    fields: str | None = Query(default=None, description="e.g. nct_id,phase"),
     db: Session = Depends(get_db),
 ):
+    select_sql = select_fields(fields, SEARCH_FIELDS)
+
     try:
         rows = (
             db.execute(
                 text(
-                    """
+                    f"""
                 SELECT
-
-                    nct_id,
-                    official_title,
-                    overall_status,
-                    phase,
-                    study_url
-
+                    {select_sql}
                 FROM core.study
                 WHERE nct_id ILIKE :q
                    OR official_title ILIKE :q
@@ -58,6 +64,68 @@ def search_studies(
         raise handle_database_error(e, "search_studies")
 
 
+# /studies/fulltext endpoint (declared before /{nct_id} so it isn't captured by it)
+@router.get(
+    "/fulltext",
+    summary="Ranked full-text search over study titles",
+    description=(
+        "Full-text search over study_title and official_title, ordered by ts_rank. "
+        'Supports web-search syntax: "quoted phrases", OR, and -exclusions. '
+        "Returns a highlighted snippet of the official title."
+    ),
+    dependencies=[Depends(validate_query_params({"q", "limit", "offset"}))],
+)
+@cached("studies.fulltext_studies")
+def fulltext_studies(
+    q: str = Query(..., description='e.g. "breast cancer" -metastatic'),
+    limit: int = Query(default=20, ge=1, le=100),
+    offset: int = Query(default=0, ge=0),
+    db: Session = Depends(get_db),
+):
+    """
+    core.study (study_fulltext_idx)
+    """
+    require_postgres("Full-text search")
+
+    try:
+        rows = (
+            db.execute(
+                text(
+                    f"""
+                SELECT
+                    nct_id,
+                    study_title AS title,
+                    official_title,
+                    phase,
+                    overall_status,
+                    study_url,
+
+                    ts_rank({STUDY_DOCUMENT}, query) AS rank,
+                    ts_headline(
+                        'english',
+                        coalesce(official_title, study_title, ''),
+                        query,
+                        'StartSel=<b>, StopSel=</b>, MaxFragments=2, MaxWords=20, MinWords=5'
+                    ) AS snippet
+
+                FROM core.study
+                CROSS JOIN websearch_to_tsquery('english', :q) AS query
+                WHERE {STUDY_DOCUMENT} @@ query
+                ORDER BY rank DESC, nct_id
+                LIMIT :limit OFFSET :offset
+                """
+                ),
+                {"q": q.strip(), "limit": limit, "offset": offset},
+            )
+            .mappings()
+            .all()
+        )
+
+        return list(rows)
+    except Exception as e:
+        raise handle_database_error(e, "fulltext_studies")
+
+
 # /studies/{nct_id} endpoint
 @router.get(
     "/{nct_id}",
@@ -65,6 +133,7 @@ def search_studies(
     description="Fetch a single study's metadata + ClinicalTrials.gov link-out",
     dependencies=[Depends(validate_query_params(set()))],
 )
+@cached("studies.get_study", ttl=3600)
 def get_study(nct_id: str, db: Session = Depends(get_db)):
     # e.g. NCT00137111, NCT00635258, NCT00340262, NCT01501019, NCT03912506
 
@@ -124,6 +193,7 @@ def get_study(nct_id: str, db: Session = Depends(get_db)):
     description="Publications supporting a given study (NCT -> PMIDs)",
     dependencies=[Depends(validate_query_params(set()))],
 )
+@cached("studies.study_publications", ttl=3600)
 def study_publications(nct_id: str, db: Session = Depends(get_db)):
     """
     core.study s
@@ -1,32 +1,45 @@
 # app/routers/targets.py
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 
 from app.core.exceptions import handle_database_error
 from app.db.database import get_db
+from app.indexes.similarity import SimilarityMetric, get_index
 
-from app.utils.validate_query import validate_query_params
+from app.utils.cache import cached
+from app.utils.validate_query import select_fields, validate_query_params
 
 
 router = APIRouter(prefix="/targets", tags=["targets"])
 
+# allow-list for ?fields= on /targets/search
+SEARCH_FIELDS = {
+    "uniprot": "t.uniprot_id",
+    "gene_symbol": "t.gene_symbol",
+    "idgtdl": "t.idg_tdl",
+    "tcrdtargetname": "t.protein_name",
+}
+
 
 # /targets/search
 @router.get(
     "/search",
     summary="Typeahead / lookup for targets",
     description="Typeahead / lookup for targets",
-    dependencies=[Depends(validate_query_params({"q", "limit"}))],
+    dependencies=[Depends(validate_query_params({"q", "limit", "fields"}))],
 )
+@cached("targets.search_targets")
 def search_targets(
     q: str = Query(..., description="Gene symbol or UniProt substring"),
     limit: int = Query(default=20, ge=1, le=100),
+    fields: str | None = Query(default=None, description="e.g. uniprot,gene_symbol"),
     db: Session = Depends(get_db),
 ):
     """
     core.target t
     """
+    select_sql = select_fields(fields, SEARCH_FIELDS)
 
     # q is a substring search used for uniprot_id or gene_symbol mentioned in docs
     # IMPORTANT: tcrdtargetname(Target Central Resource Database?) is core.target.protein_name in this
@@ -36,15 +49,9 @@ def search_targets(
         rows = (
             db.execute(
                 text(
-                    """
+                    f"""
                 SELECT
-
-                    t.uniprot_id AS uniprot,
-                    t.gene_symbol,
-                    t.idg_tdl AS idgtdl,
-
-                    t.protein_name AS tcrdtargetname
-
+                    {select_sql}
                 FROM core.target t
                 WHERE t.uniprot_id ILIKE :q
                    OR t.gene_symbol ILIKE :q
@@ -61,3 +68,29 @@ def search_targets(
         return list(rows)
     except Exception as e:
         raise handle_database_error(e, "search_targets")
+
+
+# /targets/{uniprot}/similar
+@router.get(
+    "/{uniprot}/similar",
+    summary="Targets sharing diseases with a target",
+    description=(
+        "Top-N targets by Jaccard or cosine similarity of their disease sets, "
+        "from an in-memory disease x target incidence matrix"
+    ),
+    dependencies=[Depends(validate_query_params({"metric", "limit"}))],
+)
+def similar_targets(
+    uniprot: str,
+    metric: SimilarityMetric = Query(default="jaccard"),
+    limit: int = Query(default=20, ge=1, le=100),
+):
+    # e.g. P00533
+    try:
+        result = get_index().similar_targets(uniprot.strip().upper(), metric, limit)
+    except Exception as e:
+        raise handle_database_error(e, "similar_targets")
+
+    if result is None:
+        raise HTTPException(status_code=404, detail="Target not found.")
+    return result
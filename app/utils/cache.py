@@ -0,0 +1,256 @@
+import functools
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+
+from app.core.config import (
+    CACHE_BACKEND,
+    CACHE_MAX_ENTRIES,
+    CACHE_PATH,
+    CACHE_TTL_SECONDS,
+    CACHE_URL,
+)
+from app.core.profiling import profiling_active
+from app.db.generation import current_generation
+
+logger = logging.getLogger(__name__)
+
+# Entries are keyed by data generation, so a restore never serves stale data;
+# when a worker first sees a new generation it also deletes the old entries.
+
+
+class SQLiteCache:
+    """
+    On-disk cache shared by the workers of one host (WAL mode, so readers
+    don't block each other). Size-bounded by CACHE_MAX_ENTRIES, evicting
+    the least recently used entries.
+    """
+
+    def __init__(self, path: str, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path, timeout=5, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                generation TEXT NOT NULL,
+                value BLOB NOT NULL,
+                expires_at REAL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_accessed_idx ON entries (accessed_at);
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            """
+        )
+
+    def get(self, key: str) -> Optional[bytes]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] is not None and row[1] <= now:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                return None
+            self._conn.execute(
+                "UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            return row[0]
+
+    def set(self, key: str, generation: str, value: bytes, ttl: Optional[int]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                (key, generation, value, now + ttl if ttl else None, now),
+            )
+            self._conn.execute(
+                """
+                DELETE FROM entries WHERE key IN (
+                    SELECT key FROM entries ORDER BY accessed_at
+                    LIMIT max(0, (SELECT COUNT(*) FROM entries) - ?)
+                )
+                """,
+                (self.max_entries,),
+            )
+
+    def invalidate(self, generation: str) -> None:
+        # drop every entry of other generations, once per change across workers
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT value FROM meta WHERE key = 'generation'"
+                ).fetchone()
+                if row is None or row[0] != generation:
+                    self._conn.execute(
+                        "DELETE FROM entries WHERE generation != ?", (generation,)
+                    )
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO meta VALUES ('generation', ?)",
+                        (generation,),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+
+class RedisCache:
+    """
+    Redis (or compatible) cache shared by every host. Size bounding is left
+    to the server: configure maxmemory with maxmemory-policy allkeys-lru.
+    """
+
+    PREFIX = "tictac:"
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError(
+                "CACHE_BACKEND=redis requires the redis package (pip install redis)"
+            ) from e
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._client.get(self.PREFIX + key)
+
+    def set(self, key: str, generation: str, value: bytes, ttl: Optional[int]) -> None:
+        # generation is already the first component of key
+        self._client.set(self.PREFIX + key, value, ex=ttl or None)
+
+    def invalidate(self, generation: str) -> None:
+        marker = self.PREFIX + "generation"
+        if self._client.set(marker, generation, get=True) in (
+            generation.encode(),
+            None,
+        ):
+            return
+        keep = f"{self.PREFIX}{generation}:"
+        stale = [
+            key
+            for key in self._client.scan_iter(match=self.PREFIX + "*", count=1000)
+            if key != marker.encode() and not key.decode().startswith(keep)
+        ]
+        for i in range(0, len(stale), 1000):
+            self._client.unlink(*stale[i : i + 1000])
+
+
+_backend = None
+_backend_lock = threading.Lock()
+_generation: Optional[str] = None
+
+
+def _get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            if CACHE_BACKEND == "sqlite":
+                _backend = SQLiteCache(CACHE_PATH, CACHE_MAX_ENTRIES)
+            else:
+                _backend = RedisCache(CACHE_URL)
+        return _backend
+
+
+def _key(generation: str, namespace: str, params: Dict[str, Any]) -> str:
+    normalized = json.dumps(params, sort_keys=True, default=str, separators=(",", ":"))
+    digest = hashlib.sha256(normalized.encode()).hexdigest()[:32]
+    return f"{generation}:{namespace}:{digest}"
+
+
+def _current_generation(backend) -> str:
+    global _generation
+    generation = current_generation()
+    if generation != _generation:
+        backend.invalidate(generation)
+        _generation = generation
+    return generation
+
+
+def cache_get(namespace: str, params: Dict[str, Any]) -> Any:
+    """
+    Cached value for (namespace, params) in the current data generation,
+    or None. Cache errors are logged and treated as a miss.
+    """
+    if CACHE_BACKEND == "none":
+        return None
+    try:
+        backend = _get_backend()
+        value = backend.get(_key(_current_generation(backend), namespace, params))
+    except Exception as e:
+        logger.warning(f"Cache get failed for {namespace}: {type(e).__name__}: {e}")
+        return None
+    return None if value is None else json.loads(value)
+
+
+def cache_set(
+    namespace: str,
+    params: Dict[str, Any],
+    value: Any,
+    ttl: Optional[int] = CACHE_TTL_SECONDS,
+) -> None:
+    """
+    Store a JSON-serializable value; ttl=None keeps it until it is evicted
+    or the data generation changes. Cache errors are logged and ignored.
+    """
+    if CACHE_BACKEND == "none":
+        return
+    try:
+        backend = _get_backend()
+        generation = _current_generation(backend)
+        backend.set(
+            _key(generation, namespace, params),
+            generation,
+            json.dumps(value, separators=(",", ":")).encode(),
+            ttl,
+        )
+    except Exception as e:
+        logger.warning(f"Cache set failed for {namespace}: {type(e).__name__}: {e}")
+
+
+def cached(namespace: str, ttl: Optional[int] = CACHE_TTL_SECONDS) -> Callable:
+    """
+    Cache a read endpoint's response, keyed by its resolved query parameters
+    (defaults filled in, so equivalent requests share an entry).
+    Goes below @router.get; errors raised by the endpoint are not cached,
+    and profiled requests neither read nor fill the cache.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        if CACHE_BACKEND == "none":
+            return func
+
+        @functools.wraps(func)
+        def wrapper(**kwargs):
+            # a profiled request should time the real work, not a cache hit
+            if profiling_active():
+                return func(**kwargs)
+            params = {k: v for k, v in kwargs.items() if not isinstance(v, Session)}
+            hit = cache_get(namespace, params)
+            if hit is not None:
+                return hit
+            result = jsonable_encoder(func(**kwargs))
+            cache_set(namespace, params, result, ttl)
+            return result
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,77 @@
+import hashlib
+from typing import Any, Dict, Literal
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.db.database import IS_POSTGRES
+from app.utils.cache import cache_get, cache_set
+
+TotalMode = Literal["exact", "estimate", "capped"]
+
+# capped mode counts at most this many rows ("10,000+")
+CAPPED_TOTAL_LIMIT = 10_001
+
+
+def _filter_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    # paging params don't change the total
+    return {k: v for k, v in params.items() if k not in ("limit", "offset")}
+
+
+def _exact(db: Session, from_sql: str, params: Dict[str, Any], name: str) -> int:
+    # counts only change with the data generation, so they never expire.
+    # keyed by the SQL too: some filters (exclude_withdrawn) have no bind param
+    key = {"from_sql": hashlib.sha256(from_sql.encode()).hexdigest(), **params}
+    total = cache_get(f"count:{name}", key)
+    if total is None:
+        total = db.execute(text(f"SELECT COUNT(*) {from_sql}"), params).scalar_one()
+        cache_set(f"count:{name}", key, total, ttl=None)
+    return total
+
+
+def _estimate(db: Session, from_sql: str, params: Dict[str, Any]) -> int:
+    # planner row estimate, no scan
+    plan = db.execute(
+        text(f"EXPLAIN (FORMAT JSON) SELECT 1 {from_sql}"), params
+    ).scalar_one()
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _capped(db: Session, from_sql: str, params: Dict[str, Any]) -> int:
+    return db.execute(
+        text(f"SELECT COUNT(*) FROM (SELECT 1 {from_sql} LIMIT :_cap) capped"),
+        {**params, "_cap": CAPPED_TOTAL_LIMIT},
+    ).scalar_one()
+
+
+def count_total(
+    db: Session,
+    mode: TotalMode,
+    from_sql: str,
+    params: Dict[str, Any],
+    name: str,
+) -> Dict[str, Any]:
+    """
+    Total row count for a paged endpoint, to merge into its response.
+
+    from_sql is the endpoint's "FROM ... WHERE ..." clause, name its cache namespace.
+    - exact: COUNT(*), cached (shared across workers) per filter combination
+      per data generation
+    - estimate: the planner's row estimate from EXPLAIN (an exact count,
+      reported as such, on the DuckDB backend where COUNT(*) is cheap)
+    - capped: COUNT(*) of at most CAPPED_TOTAL_LIMIT rows; total_capped tells
+      whether there may be more
+    """
+    params = _filter_params(params)
+
+    if mode == "estimate" and IS_POSTGRES:
+        return {"total": _estimate(db, from_sql, params), "total_mode": mode}
+    if mode in ("exact", "estimate"):
+        return {"total": _exact(db, from_sql, params, name), "total_mode": "exact"}
+
+    total = _capped(db, from_sql, params)
+    return {
+        "total": total,
+        "total_mode": mode,
+        "total_capped": total >= CAPPED_TOTAL_LIMIT,
+    }
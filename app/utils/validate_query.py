@@ -13,3 +13,27 @@ def validate_query_params(allowed: set[str]):
             )
 
     return _validate
+
+
+def parse_fields(fields: str | None, allowed) -> list[str]:
+    # fields is the comma-separated ?fields= value; None/empty selects everything
+    names = list(allowed)
+    if fields:
+        names = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+        unknown = set(names) - set(allowed)
+
+        if unknown or not names:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid fields: {', '.join(sorted(unknown)) or fields}",
+            )
+
+    return names
+
+
+def select_fields(fields: str | None, columns: dict[str, str]) -> str:
+    # columns maps each public field name to its SQL expression (the allow-list)
+    return ",\n".join(
+        name if columns[name] == name else f"{columns[name]} AS {name}"
+        for name in parse_fields(fields, columns)
+    )